@@ -35,6 +35,10 @@ def parse_arguments() -> argparse.Namespace:
     - RAG_FABRIC_PATTERN: Fabric pattern to use for wisdom extraction (default: "create_micro_summary")
     - RAG_CHUNK_SIZE: Size of text chunks for splitting (default: 600)
     - RAG_CHUNK_OVERLAP: Overlap between chunks (default: 200)
+    - RAG_ANSWER_CACHE: Use the semantic answer cache in search (default: "false")
+    - RAG_HNSW_M: HNSW graph neighbors per node for new collections (default: Chroma's)
+    - RAG_HNSW_CONSTRUCTION_EF: HNSW build-time candidate list size for new collections (default: Chroma's)
+    - RAG_HNSW_SEARCH_EF: HNSW query-time candidate list size for new collections (default: Chroma's)
     - RAG_WEB_PORT: Web server port (default: 8080)
     - RAG_WEB_HOST: Web server host (default: "127.0.0.1")
     - RAG_WEB_DEBUG: Enable web debug mode (default: "false")
@@ -42,8 +46,13 @@ def parse_arguments() -> argparse.Namespace:
     - RAG_WEB_CORS_ORIGINS: Comma-separated CORS origins (optional)
     - RAG_WEB_SECRET_KEY: Flask secret key (default: "rag-web-secret-key")
     - RAG_WEB_MAX_HISTORY: Max conversation history (default: 50)
+    - RAG_WEB_MAX_HISTORY_TOKENS: Token budget for conversation history, 0 for no limit (default: 0)
     - RAG_WEB_TIMEOUT: Request timeout in seconds (default: 300)
     - RAG_WEB_WORKERS: Number of worker processes (default: 1)
+    - RAG_WEB_ASYNC_MODE: Socket.IO async mode, threading/auto/eventlet/gevent (default: "threading")
+    - RAG_WEB_REDIS_URL: Redis URL for Socket.IO message queue and shared web sessions (optional)
+    - RAG_WEB_FOLLOWUP_REUSE: Reuse the previous turn's documents for short follow-ups like "go on" (default: "true")
+    - RAG_TOKENIZER: Token counting backend, tiktoken/hf/approx (default: "tiktoken")
     """
     # Create a parent parser for shared arguments
     parent_parser = argparse.ArgumentParser(add_help=False)
@@ -249,6 +258,27 @@ def parse_arguments() -> argparse.Namespace:
         default=int(get_env_default("RAG_CHUNK_OVERLAP", "200")),
         help="Overlap between chunks (env: RAG_CHUNK_OVERLAP)",
     )
+    data_subparser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=get_env_default("RAG_HNSW_M"),
+        help="HNSW neighbors per node when creating the collection, Chroma's default "
+        "if unset (env: RAG_HNSW_M)",
+    )
+    data_subparser.add_argument(
+        "--hnsw-construction-ef",
+        type=int,
+        default=get_env_default("RAG_HNSW_CONSTRUCTION_EF"),
+        help="HNSW build-time candidate list size when creating the collection, Chroma's default "
+        "if unset (env: RAG_HNSW_CONSTRUCTION_EF)",
+    )
+    data_subparser.add_argument(
+        "--hnsw-search-ef",
+        type=int,
+        default=get_env_default("RAG_HNSW_SEARCH_EF"),
+        help="HNSW query-time candidate list size when creating the collection, Chroma's default "
+        "if unset (env: RAG_HNSW_SEARCH_EF)",
+    )
     data_subparser.add_argument(
         "--convert-to-markdown",
         action="store_true",
@@ -269,6 +299,13 @@ def parse_arguments() -> argparse.Namespace:
         default=get_env_default("RAG_MODEL", "qwen3:8b"),
         help="Model to use for the LLM (env: RAG_MODEL)",
     )
+    search_parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=(get_env_default("RAG_ANSWER_CACHE", "false") or "false").lower() == "true",
+        help="Answer from and store into the semantic answer cache, reusing the answer of a "
+        "near-identical earlier query; cached replies are marked (env: RAG_ANSWER_CACHE)",
+    )
     # model="gpt-4o",
     # model="qwen3:8b",
     # model="deepseek-r1:14b",
@@ -349,6 +386,13 @@ def parse_arguments() -> argparse.Namespace:
         default=int(get_env_default("RAG_WEB_MAX_HISTORY", 50)),
         help="Maximum conversation history length (env: RAG_WEB_MAX_HISTORY)",
     )
+    web_parser.add_argument(
+        "--max-history-tokens",
+        type=int,
+        default=int(get_env_default("RAG_WEB_MAX_HISTORY_TOKENS", 0)),
+        help="Drop the oldest messages once the history exceeds this many tokens, "
+        "0 for no limit (env: RAG_WEB_MAX_HISTORY_TOKENS)",
+    )
     web_parser.add_argument(
         "--timeout",
         type=int,
@@ -361,5 +405,39 @@ def parse_arguments() -> argparse.Namespace:
         default=int(get_env_default("RAG_WEB_WORKERS", 1)),
         help="Number of worker processes (env: RAG_WEB_WORKERS)",
     )
+    web_parser.add_argument(
+        "--async-mode",
+        type=str,
+        choices=["auto", "threading", "eventlet", "gevent"],
+        default=get_env_default("RAG_WEB_ASYNC_MODE", "threading"),
+        help="Socket.IO async mode; eventlet/gevent multiplex concurrent streams on green threads "
+        "and need the package installed (gevent also needs gevent-websocket for WebSocket "
+        "transport), auto uses whichever is installed outside debug mode and the threading "
+        "development server otherwise (env: RAG_WEB_ASYNC_MODE)",
+    )
+    web_parser.add_argument(
+        "--redis-url",
+        type=str,
+        default=get_env_default("RAG_WEB_REDIS_URL", ""),
+        help="Redis URL used as Socket.IO message queue and web session store, so several "
+        "workers can serve one UI; needs the redis package (env: RAG_WEB_REDIS_URL)",
+    )
+    web_parser.add_argument(
+        "--no-followup-reuse",
+        dest="followup_reuse",
+        action="store_false",
+        default=(get_env_default("RAG_WEB_FOLLOWUP_REUSE", "true") or "true").lower() == "true",
+        help="Retrieve documents for every message, including short follow-ups like 'go on' "
+        "that otherwise reuse the previous turn's documents (env: RAG_WEB_FOLLOWUP_REUSE)",
+    )
+    web_parser.add_argument(
+        "--tokenizer",
+        type=str,
+        choices=["tiktoken", "hf", "approx"],
+        default=get_env_default("RAG_TOKENIZER", "tiktoken"),
+        help="Token counting backend; hf uses the Rust tokenizers library, and an "
+        "unavailable backend falls back to tiktoken and then approx, which estimates "
+        "4 characters per token without loading a tokenizer (env: RAG_TOKENIZER)",
+    )
 
     return parser.parse_args()
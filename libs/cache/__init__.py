@@ -1,5 +1,9 @@
 """Module for caching LLM models and their associated functions."""
 
 from .llm_cache import pre_cache_llm_models, ProvidersToCacheSet, CacheRequirements
+from .eval_cache import Evaluation, EvaluationCache, make_evaluation_key
+from .embedding_cache import CachingEmbeddingFunction
+from .query_cache import QueryCache, bump_collection_generation
+from .answer_cache import AnswerCache
 
-__all__ = ['pre_cache_llm_models', 'ProvidersToCacheSet', 'CacheRequirements']
+__all__ = ['pre_cache_llm_models', 'ProvidersToCacheSet', 'CacheRequirements', 'Evaluation', 'EvaluationCache', 'make_evaluation_key', 'CachingEmbeddingFunction', 'QueryCache', 'bump_collection_generation', 'AnswerCache']
@@ -0,0 +1,107 @@
+"""Persistent semantic cache for generated answers."""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("RAG")
+
+DEFAULT_ANSWER_CACHE_PATH = Path.home() / ".cache" / "rag" / "answers" / "answers.sqlite"
+
+
+class AnswerCache:
+    """Answers to earlier queries, matched by cosine similarity of the query embedding.
+
+    Entries are scoped to a collection and model and expire after ttl
+    seconds. Unit embeddings are stored as float32 blobs and scored with a
+    single numpy matmul, which is plenty for the size of a local cache.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_ANSWER_CACHE_PATH,
+        similarity_threshold: float = 0.97,
+        ttl: int = 86400,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS answers (
+                    id INTEGER PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_answers_scope ON answers(collection, model)"
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Answer cache disabled: {e}")
+            self._conn = None
+
+    def get(self, collection: str, model: str, embedding: Sequence[float]) -> Optional[str]:
+        """Return the answer of the most similar unexpired query above the threshold."""
+        if self._conn is None:
+            return None
+        q = self._unit(embedding)
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT embedding, answer, query FROM answers "
+                    "WHERE collection = ? AND model = ? AND expires_at > ?",
+                    (collection, model, time.time()),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache read failed: {e}")
+                return None
+
+        rows = [row for row in rows if len(row[0]) == q.nbytes]
+        if not rows:
+            return None
+        matrix = np.frombuffer(b"".join(row[0] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = matrix @ q
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        logger.debug(f"Answer cache hit for '{rows[best][2]}' (cosine {scores[best]:.3f})")
+        return rows[best][1]
+
+    def put(self, collection: str, model: str, query: str, embedding: Sequence[float], answer: str) -> None:
+        """Store an answer and drop expired entries."""
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+                self._conn.execute(
+                    "INSERT INTO answers (collection, model, query, embedding, answer, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (collection, model, query, self._unit(embedding).tobytes(), answer, now + self.ttl),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache write failed: {e}")
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -0,0 +1,167 @@
+"""Content-addressed cache for embedding functions."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+logger = logging.getLogger("RAG")
+
+DEFAULT_EMBEDDING_CACHE_PATH = Path.home() / ".cache" / "rag" / "emb" / "embeddings.sqlite"
+
+# Largest magnitude float16 can hold; vectors beyond it are stored as float32
+FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+class CachingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Wrap an embedding function with a sha256(text) keyed memory + SQLite cache.
+
+    Vectors are stored on disk as float16, half the size of float32 with no
+    meaningful effect on cosine similarity, and widened back to float32 on
+    read. Name and config are delegated to the wrapped function, so
+    collections keep the embedding function configuration they were
+    created with.
+    """
+
+    def __init__(
+        self,
+        inner: EmbeddingFunction,
+        db_path: Optional[Path] = DEFAULT_EMBEDDING_CACHE_PATH,
+        max_entries: int = 4096,
+    ):
+        self.inner = inner
+        self.max_entries = max_entries
+        self._namespace = self._build_namespace(inner)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if db_path is not None:
+            try:
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                # WAL lets a search or web process read while a data-fill writes
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        key TEXT PRIMARY KEY,
+                        value BLOB NOT NULL,
+                        dtype TEXT NOT NULL DEFAULT 'float16'
+                    )
+                """)
+                # Caches written before float16 storage hold float32 blobs
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+                if "dtype" not in columns:
+                    self._conn.execute(
+                        "ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'"
+                    )
+                self._conn.commit()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Embedding disk cache disabled: {e}")
+                self._conn = None
+
+    @staticmethod
+    def _build_namespace(inner: EmbeddingFunction) -> str:
+        """Identify the wrapped model so different models never share entries."""
+        try:
+            config = inner.get_config()
+        except Exception:
+            config = None
+        model = config.get("model_name") if isinstance(config, dict) else None
+        return f"{type(inner).__name__}:{model or ''}"
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self._namespace}\0{text}".encode()).hexdigest()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [self._key(text) for text in input]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            found.update(self._read_disk([k for k in keys if k not in found]))
+
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            logger.debug(f"Embedding cache miss for {len(missing)}/{len(keys)} texts")
+            embeddings = self.inner([input[i] for i in missing])
+            computed = {
+                keys[i]: np.asarray(embedding, dtype=np.float32)
+                for i, embedding in zip(missing, embeddings)
+            }
+            with self._lock:
+                self._write_disk(computed)
+                for key, embedding in computed.items():
+                    self._remember(key, embedding)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._conn is None or not keys:
+            return {}
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, value, dtype FROM embeddings WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+
+        found = {}
+        for key, value, dtype in rows:
+            embedding = np.frombuffer(value, dtype=dtype).astype(np.float32)
+            self._remember(key, embedding)
+            found[key] = embedding
+        return found
+
+    def _write_disk(self, embeddings: Dict[str, np.ndarray]) -> None:
+        if self._conn is None or not embeddings:
+            return
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, value, dtype) VALUES (?, ?, ?)",
+                [self._encode(key, embedding) for key, embedding in embeddings.items()],
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    @staticmethod
+    def _encode(key: str, embedding: np.ndarray) -> Tuple[str, bytes, str]:
+        if embedding.size and float(np.abs(embedding).max()) > FLOAT16_MAX:
+            return key, embedding.tobytes(), "float32"
+        return key, embedding.astype(np.float16).tobytes(), "float16"
+
+    def _remember(self, key: str, embedding: np.ndarray) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.inner.name()
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.inner.get_config()
+
+    def is_legacy(self) -> bool:
+        return self.inner.is_legacy()
+
+    def default_space(self):
+        return self.inner.default_space()
+
+    def supported_spaces(self):
+        return self.inner.supported_spaces()
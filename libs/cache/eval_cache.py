@@ -0,0 +1,124 @@
+"""Cache for LLM search result evaluations."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("RAG")
+
+# (score, analysis, refined_query, alternative_queries)
+Evaluation = Tuple[float, str, str, Tuple[str, ...]]
+
+DEFAULT_EVAL_CACHE_PATH = Path.home() / ".cache" / "rag" / "eval" / "evaluations.sqlite"
+
+
+def make_evaluation_key(model: str, query: str, ids: List[str]) -> str:
+    """Build a stable cache key for an evaluation.
+
+    Args:
+        model: Model used for the evaluation.
+        query: Query the results were retrieved for.
+        ids: Document ids returned for the query, in rank order.
+
+    Returns:
+        Hex encoded sha256 digest of the inputs.
+    """
+    payload = json.dumps({"model": model, "query": query, "ids": ids}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EvaluationCache:
+    """In-memory LRU backed by an optional SQLite store.
+
+    Thread safe, so it can be shared by concurrent candidate evaluations.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = DEFAULT_EVAL_CACHE_PATH,
+        max_entries: int = 256,
+        ttl: int = 3600,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, Evaluation]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if db_path is not None:
+            try:
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS evaluations (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                self._conn.commit()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Evaluation disk cache disabled: {e}")
+                self._conn = None
+
+    def get(self, key: str) -> Optional[Evaluation]:
+        """Return a cached evaluation or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+            if self._conn is None:
+                return None
+
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM evaluations WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Evaluation cache read failed: {e}")
+                return None
+
+            if row is None or row[1] <= now:
+                return None
+
+            score, analysis, refined_query, *rest = json.loads(row[0])
+            alternatives = tuple(rest[0]) if rest else ()
+            value = (float(score), analysis, refined_query, alternatives)
+            self._remember(key, row[1], value)
+            return value
+
+    def set(self, key: str, value: Evaluation) -> None:
+        """Store an evaluation in memory and on disk."""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+
+            if self._conn is None:
+                return
+
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Evaluation cache write failed: {e}")
+
+    def _remember(self, key: str, expires_at: float, value: Evaluation) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -2,13 +2,32 @@
 
 import argparse
 import logging
-from typing import Set, NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Set, NamedTuple, Tuple
 from typing_extensions import TypeAlias
 
 logger = logging.getLogger("RAG")
 
 ProvidersToCacheSet: TypeAlias = Set[str]
 
+# args attributes holding the Ollama host/port a provider is probed at, keyed by
+# (provider, used as LLM, used for embeddings). Only an Ollama used just for the
+# LLM goes to the LLM instance; everything else, including an Ollama serving
+# both roles and all of data-fill, goes to the embedding instance.
+_ENDPOINT_ATTRS: Dict[Tuple[str, bool, bool], Tuple[str, str]] = {
+    ("ollama", True, False): ("ollama_host", "ollama_port"),
+}
+_DEFAULT_ENDPOINT_ATTRS = ("embedding_ollama_host", "embedding_ollama_port")
+
+# Provider roles each subcommand needs models for; anything else caches both to be safe
+_PROVIDERS_NEEDED: Dict[str, Tuple[str, ...]] = {
+    "data-fill": ("embedding_llm_provider",),
+    "web": ("llm_provider", "embedding_llm_provider"),
+    "search": ("llm_provider", "embedding_llm_provider"),
+    "chat": ("llm_provider", "embedding_llm_provider"),
+}
+_DEFAULT_PROVIDERS_NEEDED = ("llm_provider", "embedding_llm_provider")
+
 
 class CacheRequirements(NamedTuple):
     """Requirements for caching LLM models."""
@@ -16,6 +35,13 @@ class CacheRequirements(NamedTuple):
     embedding_llm_provider: str
     subcommand: str
 
+    def host_port_for(self, provider: str, args: argparse.Namespace) -> Tuple[str, int]:
+        """Ollama host and port to use when pre-caching models for a provider."""
+        as_llm = provider == self.llm_provider and self.subcommand != "data-fill"
+        as_embedding = provider == self.embedding_llm_provider
+        host_attr, port_attr = _ENDPOINT_ATTRS.get((provider, as_llm, as_embedding), _DEFAULT_ENDPOINT_ATTRS)
+        return getattr(args, host_attr), getattr(args, port_attr)
+
 
 def get_providers_to_cache(requirements: CacheRequirements) -> ProvidersToCacheSet:
     """Get set of providers that need to be cached based on subcommand requirements.
@@ -26,20 +52,8 @@ def get_providers_to_cache(requirements: CacheRequirements) -> ProvidersToCacheS
     Returns:
         Set of provider names that need to be cached.
     """
-    llm_provider = requirements.llm_provider
-    embedding_llm_provider = requirements.embedding_llm_provider
-    subcommand = requirements.subcommand
-
-    # Pre-cache models based on the subcommand requirements
-    if subcommand == "data-fill":
-        # data-fill only needs embedding models
-        return {embedding_llm_provider}
-    elif subcommand in ["web", "search", "chat"]:
-        # These commands need both LLM and embedding models
-        return {llm_provider, embedding_llm_provider}
-    else:
-        # Default: cache both to be safe
-        return {llm_provider, embedding_llm_provider}
+    roles = _PROVIDERS_NEEDED.get(requirements.subcommand, _DEFAULT_PROVIDERS_NEEDED)
+    return {getattr(requirements, role) for role in roles}
 
 
 def pre_cache_llm_models(
@@ -52,61 +66,22 @@ def pre_cache_llm_models(
     Args:
         requirements: Cache requirements including providers and subcommand
         process_list_models: Function to list available models for a provider
-        ollama_host: Ollama server host for LLM
-        ollama_port: Ollama server port for LLM
-        embedding_ollama_host: Ollama server host for embeddings
-        embedding_ollama_port: Ollama server port for embeddings
+        args: Parsed arguments holding the LLM and embedding Ollama host/port
     """
     providers_to_cache = get_providers_to_cache(requirements)
 
-    for provider in providers_to_cache:
-        logger.debug(f"Pre-caching models for {provider}...")
+    def pre_cache(provider: str) -> None:
         try:
-            # Use appropriate Ollama host/port based on subcommand and provider
-            if provider == "ollama":
-                if requirements.subcommand == "data-fill":
-                    # data-fill only uses Ollama for embeddings
-                    host, port = args.embedding_ollama_host, args.embedding_ollama_port
-                    logger.debug(f"data-fill with Ollama: using embedding settings {host}:{port}")
-
-                elif (requirements.llm_provider == "ollama" and requirements.embedding_llm_provider == "ollama"):
-                    # Both LLM and embedding use Ollama - check if they use different instances
-                    if (args.ollama_host == args.embedding_ollama_host and args.ollama_port == args.embedding_ollama_port):
-                        # Same Ollama instance for both - use LLM settings
-                        host, port = args.ollama_host, args.ollama_port
-                        logger.debug(
-                            "Ollama for both LLM and embedding (same instance): "
-                            f"using LLM settings {host}:{port}"
-                        )
-                    else:
-                        # Different Ollama instances - use embedding settings
-                        # since that's what most operations need
-                        host, port = args.embedding_ollama_host, args.embedding_ollama_port
-                        logger.debug(
-                            "Ollama for both LLM and embedding (different instances): "
-                            f"using embedding settings {host}:{port}"
-                        )
-                elif requirements.llm_provider == "ollama":
-                    # Only LLM uses Ollama
-                    host, port = args.ollama_host, args.ollama_port
-                    logger.debug(f"Ollama for LLM only: using {host}:{port}")
-                else:
-                    # Only embedding uses Ollama (or this is embedding pre-caching)
-                    host, port = args.embedding_ollama_host, args.embedding_ollama_port
-                    logger.debug(f"Ollama for embedding: using {host}:{port}")
-            else:
-                # For non-Ollama providers (gemini, openai), use embedding Ollama settings
-                # since they might need Ollama for embeddings
-                host, port = args.embedding_ollama_host, args.embedding_ollama_port
-                logger.debug(f"Non-Ollama provider {provider}: using embedding Ollama {host}:{port}")
-
+            host, port = requirements.host_port_for(provider, args)
+            logger.debug(f"Pre-caching models for {provider} (Ollama at {host}:{port})...")
             process_list_models(
-                provider=provider,
+                args=argparse.Namespace(provider=provider, silent=True, ollama_host=host, ollama_port=port),
                 force_refresh=False,
-                silent=True,
-                ollama_host=host,
-                ollama_port=port
             )
         except Exception as e:
             logger.warning(f"Could not pre-cache models for {provider}: {e}")
             # Continue anyway - this is just optimization
+
+    # Probes are independent network calls, so providers are probed concurrently
+    with ThreadPoolExecutor(max_workers=len(providers_to_cache) or 1, thread_name_prefix="rag-precache") as executor:
+        list(executor.map(pre_cache, providers_to_cache))
@@ -0,0 +1,171 @@
+"""Exact and semantic cache for vector store query results."""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import QueryResult
+
+logger = logging.getLogger("RAG")
+
+# Collection metadata key data-fill sets to a fresh value after every run, so
+# readers can tell their cached results were built from older contents
+GENERATION_METADATA_KEY = "rag:generation"
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for exact-match lookups."""
+    return " ".join(text.lower().split())
+
+
+def collection_state(collection: Collection) -> Tuple[str, Any]:
+    """Identify a collection's contents by its id (new after --cleanup) and data-fill generation."""
+    return str(collection.id), (collection.metadata or {}).get(GENERATION_METADATA_KEY)
+
+
+def bump_collection_generation(collection: Collection) -> None:
+    """Record that the collection's contents changed, invalidating QueryCache entries built on them."""
+    metadata = dict(collection.metadata or {})
+    metadata[GENERATION_METADATA_KEY] = uuid.uuid4().hex
+    try:
+        collection.modify(metadata=metadata)
+    except Exception as e:
+        logger.warning(f"Could not stamp collection '{collection.name}' as updated: {e}")
+
+
+class QueryCache:
+    """Two-tier cache for query results.
+
+    Exact hits are keyed by normalized query text. Near-duplicate queries are
+    matched by cosine similarity against the embeddings of recent queries,
+    stored as int8 codes with a per-vector scale (4x smaller than float32).
+
+    The whole cache is dropped when the collection state passed to sync()
+    changes, i.e. after a data-fill bumped the collection's generation.
+    Entries also expire after ttl seconds as a backstop.
+    """
+
+    def __init__(self, max_entries: int = 256, similarity_threshold: float = 0.97, ttl: float = 300):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._exact: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._state: Any = None
+        # Ring buffer of int8-quantized unit query embeddings and their results
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.zeros(max_entries, dtype=np.float32)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._results: list = [None] * max_entries
+        self._size = 0
+        self._next = 0
+
+    def sync(self, state: Any) -> None:
+        """Drop all cached results if the collection state differs from the last call."""
+        with self._lock:
+            if state != self._state:
+                if self._state is not None:
+                    logger.debug(f"Collection state changed ({self._state} -> {state}), clearing query cache")
+                self._clear_locked()
+                self._state = state
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return unexpired results cached for the exact (normalized) query text."""
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._exact[key]
+                return None
+            self._exact.move_to_end(key)
+            return entry[1]
+
+    def get_similar(self, embedding: Sequence[float]) -> Optional[Any]:
+        """Return results of the most similar cached query above the threshold."""
+        q = self._unit(embedding)
+        with self._lock:
+            if self._codes is None or self._size == 0 or q.shape[0] != self._codes.shape[1]:
+                return None
+            scores = (self._codes[: self._size] @ q) * self._scales[: self._size]
+            scores[self._expires[: self._size] <= time.monotonic()] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            logger.debug(f"Semantic query cache hit (cosine {scores[best]:.3f})")
+            return self._results[best]
+
+    def put(self, text: str, embedding: Optional[Sequence[float]], results: Any) -> None:
+        """Cache results under the query text and, if given, its embedding."""
+        key = normalize_query(text)
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._exact[key] = (expires_at, results)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if embedding is None:
+                return
+            q = self._unit(embedding)
+            if self._codes is None or q.shape[0] != self._codes.shape[1]:
+                self._codes = np.zeros((self.max_entries, q.shape[0]), dtype=np.int8)
+                self._size = 0
+                self._next = 0
+            peak = float(np.abs(q).max())
+            scale = peak / 127 if peak > 0 else 1.0
+            self._codes[self._next] = np.round(q / scale).astype(np.int8)
+            self._scales[self._next] = scale
+            self._expires[self._next] = expires_at
+            self._results[self._next] = results
+            self._next = (self._next + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def query(
+        self,
+        collection: Collection,
+        embedding_function: Callable[[list], Sequence[Sequence[float]]],
+        text: str,
+        n_results: int = 4,
+    ) -> QueryResult:
+        """Query the collection, reusing results of identical or near-identical questions."""
+        # Read from the handle's metadata, so this costs no round trip to Chroma
+        self.sync(collection_state(collection))
+        results = self.get(text)
+        if results is not None:
+            return results
+
+        # Embed once here so Chroma doesn't have to embed the query again
+        query_embedding = embedding_function([text])[0]
+        results = self.get_similar(query_embedding)
+        if results is None:
+            # The prompts only use documents and metadata; skip distances on the wire
+            results = collection.query(
+                query_embeddings=[query_embedding], n_results=n_results, include=["documents", "metadatas"]
+            )
+        self.put(text, query_embedding, results)
+        return results
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self) -> None:
+        self._exact.clear()
+        self._codes = None
+        self._results = [None] * self.max_entries
+        self._size = 0
+        self._next = 0
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
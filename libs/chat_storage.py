@@ -3,7 +3,7 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +17,7 @@ class StoredMessage:
     content: str
     created_at: datetime
     metadata: Optional[dict] = None
+    token_count: Optional[int] = None
 
 
 @dataclass
@@ -55,9 +56,14 @@ class ChatStorage:
                     content TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     metadata TEXT,  -- JSON string for additional data
+                    token_count INTEGER,
                     FOREIGN KEY(chat_id) REFERENCES chats(id) ON DELETE CASCADE
                 )
             """)
+            # Databases created before token_count was stored
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+            if "token_count" not in columns:
+                conn.execute("ALTER TABLE messages ADD COLUMN token_count INTEGER")
             conn.commit()
 
     def create_chat(self, title: str) -> str:
@@ -71,7 +77,14 @@ class ChatStorage:
             conn.commit()
         return chat_id
 
-    def add_message(self, chat_id: str, role: str, content: str, metadata: Optional[dict] = None) -> str:
+    def add_message(
+        self,
+        chat_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[dict] = None,
+        token_count: Optional[int] = None,
+    ) -> str:
         """Add a message to a chat and return message ID"""
         message_id = str(uuid.uuid4())
         with sqlite3.connect(self.db_path) as conn:
@@ -82,8 +95,8 @@ class ChatStorage:
             )
             # Insert message
             conn.execute(
-                "INSERT INTO messages (id, chat_id, role, content, metadata) VALUES (?, ?, ?, ?, ?)",
-                (message_id, chat_id, role, content, str(metadata) if metadata else None)
+                "INSERT INTO messages (id, chat_id, role, content, metadata, token_count) VALUES (?, ?, ?, ?, ?, ?)",
+                (message_id, chat_id, role, content, str(metadata) if metadata else None, token_count)
             )
             conn.commit()
         return message_id
@@ -116,7 +129,8 @@ class ChatStorage:
                     role=msg['role'],
                     content=msg['content'],
                     created_at=datetime.fromisoformat(msg['created_at']),
-                    metadata=eval(msg['metadata']) if msg['metadata'] else None
+                    metadata=eval(msg['metadata']) if msg['metadata'] else None,
+                    token_count=msg['token_count'],
                 ))
 
             return StoredChat(
@@ -148,7 +162,8 @@ class ChatStorage:
                         role=msg['role'],
                         content=msg['content'],
                         created_at=datetime.fromisoformat(msg['created_at']),
-                        metadata=eval(msg['metadata']) if msg['metadata'] else None
+                        metadata=eval(msg['metadata']) if msg['metadata'] else None,
+                        token_count=msg['token_count'],
                     ))
 
                 chats.append(StoredChat(
@@ -161,6 +176,24 @@ class ChatStorage:
                 ))
         return chats
 
+    def get_token_usage(self, chat_id: str) -> Dict[str, int]:
+        """Sum stored token counts per role without loading message contents
+
+        "uncounted" is the number of messages stored without a token count.
+        """
+        usage = {"user": 0, "assistant": 0, "messages": 0, "uncounted": 0}
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT role, COALESCE(SUM(token_count), 0), COUNT(*), COUNT(*) - COUNT(token_count) "
+                "FROM messages WHERE chat_id = ? GROUP BY role",
+                (chat_id,)
+            ).fetchall()
+        for role, tokens, messages, uncounted in rows:
+            usage["user" if role == "user" else "assistant"] += tokens
+            usage["messages"] += messages
+            usage["uncounted"] += uncounted
+        return usage
+
     def delete_chat(self, chat_id: str) -> bool:
         """Delete a chat and all its messages"""
         with sqlite3.connect(self.db_path) as conn:
@@ -178,6 +211,15 @@ class ChatStorage:
             conn.commit()
             return cursor.rowcount > 0
 
+    def get_chat_title(self, chat_id: str) -> Optional[str]:
+        """Get chat's title without loading its messages"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT title FROM chats WHERE id = ?",
+                (chat_id,)
+            ).fetchone()
+            return row[0] if row else None
+
     def update_chat_title(self, chat_id: str, title: str) -> bool:
         """Update chat's title"""
         with sqlite3.connect(self.db_path) as conn:
@@ -205,7 +247,8 @@ class ChatStorage:
                     role=row['role'],
                     content=row['content'],
                     created_at=datetime.fromisoformat(row['created_at']),
-                    metadata=eval(row['metadata']) if row['metadata'] else None
+                    metadata=eval(row['metadata']) if row['metadata'] else None,
+                    token_count=row['token_count'],
                 ))
         return messages
 
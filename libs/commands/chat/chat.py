@@ -12,6 +12,7 @@ from libs.commands.data_fill.embedding import set_embedding_function
 from libs.utils import format_footnotes, create_openai_client, get_tokenizer_for_model
 from libs.models import get_best_model
 from chromadb.api import ClientAPI
+from libs.cache import CachingEmbeddingFunction, QueryCache
 from libs.chat_storage import ChatStorage, StoredChat
 
 logger = logging.getLogger("RAG")
@@ -244,6 +245,7 @@ class ChatApp(App):
         chat_db_path: Optional[str] = None,
     ) -> None:
         super().__init__()
+        self.args = args
         self.conversation_history = []
         self.client = client
         self.collection_name = collection_name
@@ -256,6 +258,7 @@ class ChatApp(App):
         self.embedding_llm = embedding_llm
         self.llm_client = create_openai_client(args)
         self.embedding_function = None
+        self.query_cache = QueryCache()
         self.conversation_history: List[Dict[str, str]] = []
         self.tokenizer = get_tokenizer_for_model(self.model)
         if chat_db_path:
@@ -356,12 +359,12 @@ class ChatApp(App):
             yield Button("Send", id="send-button")
         yield Footer()
 
-    def on_mount(self, args: argparse.Namespace) -> None:
+    def on_mount(self) -> None:
         """Set up the application when it starts"""
         # Set Tokyo Night theme as default
         self.theme = "tokyo-night"
 
-        self.embedding_function = set_embedding_function(args)
+        self.embedding_function = CachingEmbeddingFunction(set_embedding_function(self.args))
 
         # Set text content after mounting
         self.query_one("#status", Static).update(
@@ -565,7 +568,7 @@ class ChatApp(App):
                 embedding_function=self.embedding_function
             )
 
-            results = collection.query(query_texts=[user_message], n_results=4)
+            results = self.query_cache.query(collection, self.embedding_function, user_message)  # type: ignore[arg-type]
             system_prompt = self._build_system_prompt(results)
 
             # Prepare messages for LLM
@@ -1,16 +1,30 @@
 import logging
 import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple
 from chromadb.api import ClientAPI
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Metadata, OneOrMany
+from langchain_core.documents import Document
+
+from libs.cache import CachingEmbeddingFunction, bump_collection_generation
 
 from .embedding import set_embedding_function
 from .documents_types.markdown import process_markdown_documents
 
 logger = logging.getLogger("RAG")
 
+UPSERT_BATCH_SIZE = 512
+UPSERT_WORKERS = 4
+UPSERT_MAX_IN_FLIGHT = UPSERT_WORKERS * 2
+
+# (documents, metadatas, ids) for one collection.upsert call
+Batch = Tuple[List[str], Optional[OneOrMany[Metadata]], List[str]]
+
 
 def delete_collection(client: ClientAPI, collection: str) -> None:
     """Delete a collection from ChromaDB"""
@@ -25,33 +39,76 @@ def delete_collection(client: ClientAPI, collection: str) -> None:
 def create_get_collection(
     args: argparse.Namespace,
     client: ClientAPI, collection_name: str
-) -> None:
-    embedding_function = set_embedding_function(args)
+) -> Collection:
+    # Unchanged chunks are served from the on-disk embedding cache on re-fills
+    embedding_function = CachingEmbeddingFunction(set_embedding_function(args))
+
+    # Only the HNSW parameters passed on the command line override Chroma's defaults
+    hnsw = {
+        key: value
+        for key, value in (
+            ("max_neighbors", args.hnsw_m),
+            ("ef_construction", args.hnsw_construction_ef),
+            ("ef_search", args.hnsw_search_ef),
+        )
+        if value is not None
+    }
 
     try:
         logger.debug(
-            f"Creating/getting collection {args.collection_name} with Ollama embedding function..."
+            f"Creating/getting collection {collection_name} with Ollama embedding function..."
+        )
+        collection = client.get_or_create_collection(
+            name=collection_name,
+            embedding_function=embedding_function,
+            # Only applied when the collection is created; existing ones keep their index
+            configuration={"hnsw": hnsw} if hnsw else None,  # type: ignore[arg-type]
         )
-        collection = client.get_or_create_collection(name=args.collection_name, embedding_function=embedding_function)
         logger.debug(f"Collection '{collection}' created/gotten")
     except Exception as e:
-        logger.error(f"Error creating/getting collection {args.collection_name}: {e}")
+        logger.error(f"Error creating/getting collection {collection_name}: {e}")
         exit(1)
+    return collection
+
+
+def _iter_single_mode_batches(splitter, raw_documents, id_prefix: str) -> Iterator[Batch]:
+    """Split documents one at a time and yield upsert batches as soon as they fill up"""
+    pending: List[Document] = []
+    start = 0
+    for raw_document in raw_documents:
+        pending.extend(splitter.split_documents([raw_document]))
+        while len(pending) >= UPSERT_BATCH_SIZE:
+            batch, pending = pending[:UPSERT_BATCH_SIZE], pending[UPSERT_BATCH_SIZE:]
+            yield process_markdown_documents(batch, "single", id_prefix, start)
+            start += len(batch)
+    if pending:
+        yield process_markdown_documents(pending, "single", id_prefix, start)
+
+
+def _iter_processed_batches(chunks: List[Document], mode: str, id_prefix: str) -> Iterator[Batch]:
+    """Process all chunks at once and yield them in upsert batches"""
+    documents, metadata, ids = process_markdown_documents(chunks, mode, id_prefix)
+    for i in range(0, len(documents), UPSERT_BATCH_SIZE):
+        yield (
+            documents[i:i + UPSERT_BATCH_SIZE],
+            metadata[i:i + UPSERT_BATCH_SIZE],  # type: ignore[index]
+            ids[i:i + UPSERT_BATCH_SIZE],
+        )
 
 
 def insert_into_collection(
     collection: Collection,
     raw_documents,
     args: argparse.Namespace,
+    id_prefix: str,
 ) -> None:
     logger.debug(
-        f"Bootstrapping collection '{args.collection_name}' with {len(raw_documents)} documents"
+        f"Bootstrapping collection '{args.collection}' with {len(raw_documents)} documents"
     )
     logger.debug(
         f"Using embedding model '{args.embedding_model}' with provider '{args.embedding_llm}'"
     )
 
-    logger.debug(f"Splitting {len(raw_documents)} documents into chunks")
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
@@ -59,16 +116,39 @@ def insert_into_collection(
         is_separator_regex=False,
     )
 
-    chunks = splitter.split_documents(raw_documents)
-    logger.debug(
-        f"Split {len(raw_documents)} documents into {len(chunks)} chunks"
-    )
+    if args.mode == "single":
+        # Chunks are independent, so splitting overlaps with the embedding of earlier batches
+        batches = _iter_single_mode_batches(splitter, raw_documents, id_prefix)
+    else:
+        # Elements resolve their parents across the whole corpus, so it is split up front
+        logger.debug(f"Splitting {len(raw_documents)} documents into chunks")
+        chunks = splitter.split_documents(raw_documents)
+        logger.debug(
+            f"Split {len(raw_documents)} documents into {len(chunks)} chunks"
+        )
+        batches = _iter_processed_batches(chunks, args.mode, id_prefix)
 
-    documents, metadata, ids = process_markdown_documents(chunks, args.mode, args.id_prefix)
-    logger.debug(
-        f"Upserting {len(documents)} documents into collection '{args.collection_name}'"
-    )
-    collection.upsert(documents=documents, metadatas=metadata, ids=ids)
+    # Embedding + upsert is I/O bound, so batches are written concurrently;
+    # in-flight batches are capped so splitting can't run far ahead of embedding
+    upserted = 0
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS, thread_name_prefix="rag-upsert") as executor:
+        in_flight: Deque[Future] = deque()
+        for batch_documents, batch_metadata, batch_ids in batches:
+            in_flight.append(
+                executor.submit(
+                    collection.upsert,
+                    documents=batch_documents,
+                    metadatas=batch_metadata,
+                    ids=batch_ids,
+                )
+            )
+            upserted += len(batch_documents)
+            if len(in_flight) >= UPSERT_MAX_IN_FLIGHT:
+                in_flight.popleft().result()
+        for future in in_flight:
+            future.result()
+    # Running chats drop query results cached against the previous contents
+    bump_collection_generation(collection)
     logger.debug(
-        f"Upserted {len(documents)} documents into collection '{args.collection_name}'"
+        f"Upserted {upserted} documents into collection '{args.collection}'"
     )
@@ -2,8 +2,10 @@ import logging
 import hashlib
 import argparse
 import io
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from typing import List, Optional
+from typing import Callable, Deque, List, Optional, Tuple
 
 from langchain_core.documents import Document
 
@@ -20,36 +22,62 @@ from .wisdom import extract_wisdom, check_fabric_installed
 
 logger = logging.getLogger("RAG")
 
+# Sources loaded (URLs fetched and converted) ahead of the one being processed
+LOAD_WORKERS = 4
+
 
 def process_data_fill(
-    client: Optional[ClientAPI],
+    client_factory: Optional[Callable[[], ClientAPI]],
     args: argparse.Namespace,
 ) -> None:
-    collection = None
-    if client is not None and args.cleanup:
-        delete_collection(client, args.collection)
-        collection = create_get_collection(args, client, args.collection)
+    collection: Optional[Collection] = None
+
+    def get_collection() -> Optional[Collection]:
+        # ChromaDB is opened (and cleaned up) when the first source has documents,
+        # so a run that loads nothing never touches the database
+        nonlocal collection
+        if collection is None and client_factory is not None:
+            client = client_factory()
+            if args.cleanup:
+                delete_collection(client, args.collection)
+            collection = create_get_collection(args, client, args.collection)
+        return collection
 
     # Set up OpenWebUIUploader if needed
     openwebui_uploader = None
     if args.upload_to_open_webui:
         openwebui_uploader = OpenWebUIUploader(args=args)
 
-    for source_path_arg in args.source_path:
+    def load(source_path_arg: str) -> Tuple[str, str, List[Document]]:
         source_path, override_title = parse_source_with_title(source_path_arg)
         documents = load_documents(source_path=source_path, args=args, override_title=override_title)
+        return source_path, override_title, documents
+
+    def process(loaded: Tuple[str, str, List[Document]]) -> None:
+        source_path, override_title, documents = loaded
         if len(documents) == 0:
             logger.warning(f"No documents found in {source_path}. Skipping...")
-            continue
+            return
         process_source_path(
             source_path=source_path,
-            collection=collection,
+            collection=get_collection(),
             args=args,
             documents=documents,
             openwebui_uploader=openwebui_uploader,
             override_title=override_title,
         )
 
+    # Fetching and converting is I/O bound, so later sources load while earlier
+    # ones are processed; processing itself stays sequential and in order
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="rag-load") as executor:
+        pending: Deque[Future] = deque()
+        for source_path_arg in args.source_path:
+            pending.append(executor.submit(load, source_path_arg))
+            if len(pending) > LOAD_WORKERS:
+                process(pending.popleft().result())
+        while pending:
+            process(pending.popleft().result())
+
 
 def process_source_path(
         source_path: str,
@@ -91,15 +119,16 @@ def process_source_path(
             content_with_metadata += "---\n\n"
             content_with_metadata += doc.page_content
 
-            # Debug logging before encoding
-            logger.debug(f"Preparing to upload file: {doc.metadata['title']}")
-            logger.debug("Content preview before encoding:")
-            logger.debug(content_with_metadata[:500] + "..." if len(content_with_metadata) > 500 else content_with_metadata)
-
             file_content = content_with_metadata.encode("utf-8")
-            content_size = len(file_content)
-            logger.debug(f"Content size after encoding: {content_size} bytes")
-            logger.debug(f"Metadata: {doc.metadata}")
+
+            # Per-document debug output formats the metadata dict and a content
+            # preview, so only build it when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Preparing to upload file: {doc.metadata['title']}")
+                logger.debug("Content preview before encoding:")
+                logger.debug(content_with_metadata[:500] + "..." if len(content_with_metadata) > 500 else content_with_metadata)
+                logger.debug(f"Content size after encoding: {len(file_content)} bytes")
+                logger.debug(f"Metadata: {doc.metadata}")
 
             file_obj = io.BytesIO(file_content)
             file_obj.name = doc.metadata["sanitized_title"]  # requests uses this for the filename
@@ -143,7 +172,7 @@ def process_source_path(
 
         if collection is not None:
             logger.debug(
-                f"Filling collection '{args.collection}' with data from {args.source_paths}"
+                f"Filling collection '{args.collection}' with data from {source_path}"
             )
 
             id_prefix = hashlib.sha256(source_path.encode()).hexdigest()[:20]
@@ -157,6 +186,7 @@ def process_source_path(
                 collection=collection,
                 raw_documents=documents,
                 args=args,
+                id_prefix=id_prefix,
             )
 
             logger.debug(f"Collection '{args.collection}' has been created and filled with data.")
@@ -4,7 +4,7 @@ import os
 from langchain_core.documents import Document
 from typing import List
 
-from ..validation import validate_is_pdf, validate_file, validate_directory, validate_is_epub
+from ..validation import safe_stat, validate_is_pdf, validate_file, validate_directory, validate_is_epub
 from .epub import prepare_epub_documents
 from .pdf import prepare_pdf_documents
 from .markdown import prepare_markdown_documents
@@ -22,9 +22,15 @@ def load_file_documents(source_path: str, args: argparse.Namespace, should_conve
 
     full_path = str(full_path).replace('\\', '')
 
-    if validate_file(full_path):
+    # One stat serves both checks
+    st = safe_stat(full_path)
+    if st is None:
+        logger.error(f"Path {full_path} does not exist or is not accessible")
+        return []
+
+    if validate_file(full_path, st):
         return load_file_document(full_path, args, should_convert_to_markdown=should_convert_to_markdown, override_title=override_title)
-    elif validate_directory(full_path):
+    elif validate_directory(full_path, st):
         return load_directory_documents(full_path, args, should_convert_to_markdown=should_convert_to_markdown, override_title=override_title)
     else:
         logger.error(f"Path {full_path} is not a valid file or directory")
@@ -1,7 +1,7 @@
 import logging
 import argparse
 from langchain_core.documents import Document
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import hashlib
 
 from chromadb.api.types import (
@@ -16,64 +16,77 @@ logger = logging.getLogger("RAG")
 
 
 def process_markdown_documents(
-    chunks: List[Document], mode: str, id_prefix: str
+    chunks: List[Document], mode: str, id_prefix: str, start: int = 0
 ) -> tuple[List[str], Optional[OneOrMany[Metadata]], List[str]]:
-    """Process markdown documents and extract metadata"""
+    """Process markdown documents and extract metadata
+
+    In single mode ids are numbered from start, so batches of one corpus can be processed separately.
+    """
     documents: List[str] = []
     metadata: Optional[OneOrMany[Metadata]] = []
     ids: List[str] = []
     logger.debug(f"Processing {len(chunks)} chunks in {mode} mode")
 
     if mode == "single":
-        i = 0
-        for chunk in chunks:
-            documents.append(chunk.page_content)
-            ids.append(f"{id_prefix}_{i}")  # Consistent f-string usage
-            metadata.append(chunk.metadata)
-            i += 1
+        documents = [chunk.page_content for chunk in chunks]
+        ids = [f"{id_prefix}_{i}" for i in range(start, start + len(chunks))]
+        # Chroma metadata values are scalars, so list values (e.g. tags) are flattened
+        metadata = [
+            {key: ", ".join(value) if type(value) is list else value for key, value in chunk.metadata.items()}
+            for chunk in chunks
+        ]
 
     if mode == "elements":
         # Build element_id map
         elements_by_id = {doc.metadata["element_id"]: doc for doc in chunks}
 
-        def get_ancestor_chain(doc_id, elements_by_id, max_levels=100):
-            chain = []
+        # (root ancestor, direct parent) per element id, None for elements without a parent.
+        # Only the two ends of the ancestor chain are used, so siblings share their parent's result
+        chain_ends: Dict[str, Optional[Tuple[Document, Document]]] = {}
+
+        def get_chain_ends(doc_id):
+            # Climb until an element with known ends, a root or a cycle
+            path = []
+            visited = set()
             current_id = doc_id
-            levels = 0
-            while levels < max_levels:
+            while current_id not in chain_ends and current_id not in visited:
+                visited.add(current_id)
                 doc = elements_by_id.get(current_id)
-                if not doc or "parent_id" not in doc.metadata:
-                    break
-                parent_id = doc.metadata["parent_id"]
-                parent = elements_by_id.get(parent_id)
+                parent_id = doc.metadata.get("parent_id") if doc else None
+                parent = elements_by_id.get(parent_id) if parent_id is not None else None
                 if not parent:
+                    chain_ends[current_id] = None
                     break
-                chain.insert(0, parent)
+                path.append((current_id, parent_id, parent))
                 current_id = parent_id
-                levels += 1
-            return chain
+            # Resolve top-down so every element on the path reuses its parent's root
+            for element_id, parent_id, parent in reversed(path):
+                parent_ends = chain_ends.get(parent_id)
+                chain_ends[element_id] = (parent_ends[0] if parent_ends else parent, parent)
+            return chain_ends[doc_id]
 
         for i, chunk in enumerate(chunks):
             element_id = chunk.metadata["element_id"]
-            parent_chain_docs = get_ancestor_chain(element_id, elements_by_id)
+            ends = get_chain_ends(element_id)
 
             documents.append(chunk.page_content)
             # Use a hash of id_prefix and element_id for uniqueness
             unique_element_id = hashlib.sha256(f"{id_prefix}_{element_id}".encode()).hexdigest()[:20]
             ids.append(unique_element_id)
 
-            temp_metadata = {}
-            for key, value in chunk.metadata.items():
-                temp_metadata[key] = (
-                    ", ".join(value) if isinstance(value, list) else value
-                )
+            # Flatten list values; the exact type check is cheaper than isinstance in this hot loop
+            temp_metadata = {
+                key: ", ".join(value) if type(value) is list else value
+                for key, value in chunk.metadata.items()
+            }
 
-            if parent_chain_docs:
-                temp_metadata["page_title"] = parent_chain_docs[0].page_content
+            if ends:
+                root_doc, parent_doc = ends
+                temp_metadata["page_title"] = root_doc.page_content
                 temp_metadata["sanitized_title"] = (
                     chunk.page_content
                     if chunk.metadata.get("category") == "Title"
-                    else parent_chain_docs[-1].page_content
+                    else parent_doc.page_content
                 )
             else:
                 temp_metadata["page_title"] = chunk.page_content
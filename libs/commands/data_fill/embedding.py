@@ -1,6 +1,7 @@
 import argparse
 import os
 import logging
+from functools import lru_cache
 from chromadb.utils.embedding_functions import (
     OllamaEmbeddingFunction,
     GoogleGenerativeAiEmbeddingFunction,
@@ -13,37 +14,55 @@ logger = logging.getLogger("RAG")
 
 
 def set_embedding_function(args: argparse.Namespace) -> EmbeddingFunction:
-    """Set up the appropriate embedding function based on the LLM provider"""
+    """Set up the appropriate embedding function based on the LLM provider
+
+    Embedding functions are shared per provider, endpoint and model, so
+    repeated setups in one process reuse the same instance.
+    """
     logger.debug("Setting embedding function")
+    return _create_embedding_function(
+        args.embedding_llm,
+        args.embedding_ollama_host,
+        args.embedding_ollama_port,
+        args.embedding_model,
+    )
 
+
+@lru_cache(maxsize=8)
+def _create_embedding_function(
+    embedding_llm: str,
+    embedding_ollama_host: str,
+    embedding_ollama_port: int,
+    embedding_model: str,
+) -> EmbeddingFunction:
     # Get validated embedding model
     # For embedding operations, use embedding_ollama_host:embedding_ollama_port
     validated_model = get_best_model(
-        args.embedding_llm,
-        args.embedding_ollama_host,
-        args.embedding_ollama_port,
-        args.embedding_model,  # <-- CORRECTED
+        embedding_llm,
+        embedding_ollama_host,
+        embedding_ollama_port,
+        embedding_model,
         "embedding",
     )
 
-    if args.embedding_llm == "ollama":
+    if embedding_llm == "ollama":
         logger.debug(f"Using Ollama embedding model '{validated_model}'")
         return OllamaEmbeddingFunction(
-            url=f"http://{args.embedding_ollama_host}:{args.embedding_ollama_port}",
+            url=f"http://{embedding_ollama_host}:{embedding_ollama_port}",
             model_name=validated_model,
         )
-    elif args.embedding_llm == "openai":
+    elif embedding_llm == "openai":
         logger.debug(f"Using OpenAI embedding model '{validated_model}'")
         return OpenAIEmbeddingFunction(
             api_key=os.getenv("OPENAI_API_KEY"),
             model_name=validated_model,
         )
-    elif args.embedding_llm == "gemini":
+    elif embedding_llm == "gemini":
         logger.debug(f"Using Gemini embedding model '{validated_model}'")
         return GoogleGenerativeAiEmbeddingFunction(
             api_key=os.getenv("GEMINI_API_KEY"),
             model_name=f"models/{validated_model}",
         )
     else:
-        logger.error(f"Invalid embedding function provider: {args.embedding_llm}")
+        logger.error(f"Invalid embedding function provider: {embedding_llm}")
         exit(1)
@@ -1,6 +1,8 @@
 import re
 import boto3
 
+_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9]")
+
 
 def upload_to_s3(
     markdown_content: str, title: str, folder: str, bucket_name: str
@@ -19,7 +21,7 @@ def upload_to_s3(
         title = "untitled"
 
     # Sanitize title by replacing special characters and spaces with underscore
-    sanitized_title = re.sub(r"[^a-zA-Z0-9]", "_", title)
+    sanitized_title = _SANITIZE_RE.sub("_", title)
 
     # Ensure the title is not empty after sanitization
     if not sanitized_title:
@@ -1,6 +1,7 @@
 import os
 import re
 import logging
+from functools import lru_cache
 from bs4 import BeautifulSoup, Tag
 from typing import List
 from langchain_community.document_transformers import MarkdownifyTransformer
@@ -50,14 +51,17 @@ tags_to_remove = [
     "widget",
 ]
 
+_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9]")
+_UNDERSCORES_RE = re.compile(r"_+")
+
 
 def sanitize_filename(title: str) -> str:
     # Replace spaces and special characters with underscore
-    sanitized = re.sub(r"[^a-zA-Z0-9]", "_", title)
+    sanitized = _NON_ALNUM_RE.sub("_", title)
     # Convert to lowercase
     sanitized = sanitized.lower()
     # Replace multiple underscores with single one
-    sanitized = re.sub(r"_+", "_", sanitized)
+    sanitized = _UNDERSCORES_RE.sub("_", sanitized)
     # Remove leading/trailing underscores
     sanitized = sanitized.strip("_")
     return sanitized
@@ -122,35 +126,40 @@ def process_html_documents(
     return cleaned_docs
 
 
-def convert_to_markdown(docs: List[Document]) -> List[Document]:
+@lru_cache(maxsize=1)
+def _markdownify_transformer() -> MarkdownifyTransformer:
+    """Markdownify transformer shared by all conversions, configured once"""
     logger.debug("Configuring Markdownify transformer")
+    return MarkdownifyTransformer(
+        strip=[
+            "script",
+            "style",
+            "meta",
+            "link",
+            "iframe",
+            "button",
+            "input",
+            "select",
+            "textarea",
+        ],
+        remove=tags_to_remove,
+        heading_style="ATX",
+        bullets="-",
+        wrap=0,
+        preserve_images=True,
+        emphasis_mark="*",
+        strong_mark="**",
+        escape_asterisks=False,
+        code_language="",
+        default_title=True,
+        newline_style="\n",
+        keep_formatting=True,
+    )
+
+
+def convert_to_markdown(docs: List[Document]) -> List[Document]:
     try:
-        md = MarkdownifyTransformer(
-            strip=[
-                "script",
-                "style",
-                "meta",
-                "link",
-                "iframe",
-                "button",
-                "input",
-                "select",
-                "textarea",
-            ],
-            remove=tags_to_remove,
-            heading_style="ATX",
-            bullets="-",
-            wrap=0,
-            preserve_images=True,
-            emphasis_mark="*",
-            strong_mark="**",
-            escape_asterisks=False,
-            code_language="",
-            default_title=True,
-            newline_style="\n",
-            keep_formatting=True,
-        )
-        md_docs = list(md.transform_documents(docs))
+        md_docs = list(_markdownify_transformer().transform_documents(docs))
         return md_docs
     except Exception as e:
         logger.error(f"Failed to convert documents to markdown: {e}")
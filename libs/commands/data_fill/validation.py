@@ -1,36 +1,66 @@
 """Validation helpers module."""
 
+import os
 import re
+import stat
 import logging
 from pathlib import Path
-from typing import Union
+from urllib.parse import urlsplit
+from typing import Optional, Union
 import validators
 
 
 logger = logging.getLogger("RAG")
 
+_URL_RE = re.compile(r"^https?://[^\s/$.?#].[^\s]*$", re.IGNORECASE)
+_HOSTNAME_RE = re.compile(
+    r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$", re.IGNORECASE
+)
+_S3_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9.-]*[a-z0-9]$")
+_S3_IP_RE = re.compile(r"^\d+\.\d+\.\d+\.\d+$")
+_S3_PATH_RE = re.compile(r"^[a-zA-Z0-9!-_.*\'()/ ]+$")
+
 
 def validate_url(url: str) -> bool:
     if not isinstance(url, str):
         return False
+    # Fast reject for local paths and other non-http(s) input
+    if not _URL_RE.match(url):
+        return False
     try:
+        # Fast accept for plain http(s)://host.tld URLs
+        if _HOSTNAME_RE.match(urlsplit(url).hostname or ""):
+            return True
+        # Borderline cases (IPs, localhost, IDNs, ports) go to the full validator
         return bool(validators.url(url))
     except Exception as e:
         logger.debug(f"URL validation failed: {e}")
         return False
 
 
-def validate_file(path: Union[str, Path]) -> bool:
+def safe_stat(path: Union[str, Path]) -> Optional[os.stat_result]:
+    """Stat a path, returning None when it doesn't exist or can't be read"""
     try:
-        return Path(path).is_file()
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def validate_file(path: Union[str, Path], st: Optional[os.stat_result] = None) -> bool:
+    """Check for a regular file, reusing st when the caller already stat'ed the path"""
+    try:
+        st = st or safe_stat(path)
+        return st is not None and stat.S_ISREG(st.st_mode)
     except Exception as e:
         logger.debug(f"File validation failed: {e}")
         return False
 
 
-def validate_directory(path: Union[str, Path]) -> bool:
+def validate_directory(path: Union[str, Path], st: Optional[os.stat_result] = None) -> bool:
+    """Check for a directory, reusing st when the caller already stat'ed the path"""
     try:
-        return Path(path).is_dir()
+        st = st or safe_stat(path)
+        return st is not None and stat.S_ISDIR(st.st_mode)
     except Exception as e:
         logger.debug(f"Directory validation failed: {e}")
         return False
@@ -41,6 +71,7 @@ def validate_s3_bucket_name(bucket: str) -> bool:
         return False
 
     try:
+        # Cheap checks first, regexes last
         # Length between 3 and 63 characters
         if not (3 <= len(bucket) <= 63):
             return False
@@ -49,20 +80,20 @@ def validate_s3_bucket_name(bucket: str) -> bool:
         if bucket.startswith(".") or bucket.endswith("."):
             return False
 
+        # Adjacent periods not allowed
+        if ".." in bucket:
+            return False
+
         # Must be lowercase
         if bucket.lower() != bucket:
             return False
 
         # Must be a valid DNS name (letters, numbers, dots, and hyphens)
-        if not re.match(r"^[a-z0-9][a-z0-9.-]*[a-z0-9]$", bucket):
+        if not _S3_NAME_RE.match(bucket):
             return False
 
         # Must not be formatted as an IP address
-        if re.match(r"^\d+\.\d+\.\d+\.\d+$", bucket):
-            return False
-
-        # Adjacent periods not allowed
-        if ".." in bucket:
+        if _S3_IP_RE.match(bucket):
             return False
 
         return True
@@ -81,7 +112,7 @@ def validate_s3_bucket_path(path: str) -> bool:
 
         # Check if path contains only valid characters
         # Letters, numbers, and common special characters
-        return bool(re.match(r"^[a-zA-Z0-9!-_.*\'()/ ]+$", path))
+        return bool(_S3_PATH_RE.match(path))
     except Exception as e:
         logger.debug(f"S3 bucket path validation failed: {e}")
         return False
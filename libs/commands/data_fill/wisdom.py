@@ -2,33 +2,46 @@ import logging
 import shutil
 import subprocess
 import re
+from functools import lru_cache
 
 logger = logging.getLogger("RAG")
 
+# Pipe buffer size requested for Fabric's stdin/stdout/stderr (Linux only)
+PIPE_SIZE = 1024 * 1024
 
+
+@lru_cache(maxsize=4)
 def check_fabric_installed(command: str = "fabric") -> bool:
+    """Whether the Fabric command is on PATH, looked up once per command"""
     return shutil.which(command) is not None
 
 
 def extract_wisdom(content: str, fabric_command: str = "fabric", fabric_pattern: str = "extract_wisdom") -> str:
     try:
-        # Echo content to Fabric through stdin
+        # Echo content to Fabric through stdin; larger pipes mean fewer read/write
+        # round trips for long documents (pipesize is ignored outside Linux)
         result = subprocess.run(
-            [fabric_command, "-p", fabric_pattern], input=content, capture_output=True, text=True
+            [fabric_command, "-p", fabric_pattern],
+            input=content,
+            capture_output=True,
+            encoding="utf-8",
+            errors="replace",
+            pipesize=PIPE_SIZE,
         )
 
         if result.returncode == 0 and result.stdout:
+            output = result.stdout
 
             # strip ``` from the output beginning or ```markdown
             # remove it with regex
-            if result.stdout.startswith("```"):
-                result.stdout = re.sub(r"^```markdown?\n?", "", result.stdout)
+            if output.startswith("```"):
+                output = re.sub(r"^```markdown?\n?", "", output)
 
             # strip ``` from the output end
-            if result.stdout.endswith("```"):
-                result.stdout = result.stdout[:-3]
+            if output.endswith("```"):
+                output = output[:-3]
 
-            return result.stdout.strip()
+            return output.strip()
         else:
             logger.warning("Fabric produced no output")
             if result.stderr:
@@ -1,45 +1,18 @@
 import logging
 import argparse
+import textwrap
 from chromadb.api import ClientAPI
 from openai import OpenAI  # type: ignore
 from ..data_fill.embedding import set_embedding_function
-from ...utils import format_footnotes, print_fancy_markdown, create_openai_client
+from ...utils import format_footnotes, print_fancy_markdown, print_fancy_markdown_stream, create_openai_client
 from ...models import get_best_model
+from ...cache import AnswerCache, CachingEmbeddingFunction
 from ...search_orchestrator import SearchOrchestrator
 
 logger = logging.getLogger("RAG")
 
-
-def search(
-    client_llm: OpenAI,
-    model: str,
-    client: ClientAPI,
-    embedding_function,
-    args: argparse.Namespace,
-) -> None:
-    # Initialize search orchestrator
-    orchestrator = SearchOrchestrator(
-        client=client,
-        llm_client=client_llm,
-        collection_name=args.collection,
-        embedding_function=embedding_function,
-        model=model,
-        debug=logger.isEnabledFor(logging.DEBUG),
-    )
-
-    # Perform iterative search
-    search_result = orchestrator.perform_iterative_search(args.query)
-
-    if logger.isEnabledFor(logging.DEBUG):
-        for iteration in search_result.iterations:
-            logger.debug(f"Iteration {iteration.iteration}:")
-            logger.debug(f"Query: {iteration.query}")
-            logger.debug(f"Score: {iteration.relevance_score}")
-            logger.debug(f"Analysis: {iteration.analysis}")
-
-    results = search_result.best_results
-
-    system_prompt = """
+# Instructions and worked example the retrieved documents are appended to
+_SYSTEM_PROMPT = textwrap.dedent("""
     ### Example
     User: How can a coding buddy help with learning Rust?
 
@@ -79,22 +52,64 @@ def search(
     If the documents do not answer the question, respond with: I don't know, unless it is about code generation.
     If document refers to external resources, you can use them.
     If you don't know the answer, BUT! user requested code examples, do not scope your answert to only documents provided, but reach out to your knowledge to figure out how to generate code examples, but they have to based only on information provided in the documents.
-    """
+        """).lstrip()
+
+
+def search(
+    client_llm: OpenAI,
+    model: str,
+    client: ClientAPI,
+    embedding_function,
+    args: argparse.Namespace,
+) -> None:
+    # With --cache, near-identical earlier queries are answered without retrieval or generation
+    answer_cache = AnswerCache() if args.cache and not args.dry_run else None
+    query_embedding = None
+    if answer_cache is not None:
+        query_embedding = embedding_function([args.query])[0]
+        cached_answer = answer_cache.get(args.collection, model, query_embedding)
+        if cached_answer is not None:
+            logger.info("Answer served from the semantic answer cache (drop --cache to skip)")
+            print_fancy_markdown(cached_answer, "🤖 Agent Reply (cached)", borders_only="top_bottom")
+            return
+
+    # Initialize search orchestrator
+    orchestrator = SearchOrchestrator(
+        client=client,
+        llm_client=client_llm,
+        collection_name=args.collection,
+        embedding_function=embedding_function,
+        model=model,
+        debug=logger.isEnabledFor(logging.DEBUG),
+    )
+
+    # Perform iterative search
+    search_result = orchestrator.perform_iterative_search(args.query)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for iteration in search_result.iterations:
+            logger.debug(f"Iteration {iteration.iteration}:")
+            logger.debug(f"Query: {iteration.query}")
+            logger.debug(f"Score: {iteration.relevance_score}")
+            logger.debug(f"Analysis: {iteration.analysis}")
+
+    results = search_result.best_results
 
     footnotes_metadata = []
+    parts = [_SYSTEM_PROMPT]
 
     # Check if documents and metadatas are not None
     if results["documents"] and results["metadatas"]:
-        for i, item in enumerate(results["documents"][0]):
-            metadata_entry = results["metadatas"][0][i]
-            footnotes_metadata.append(metadata_entry)
-
-            system_prompt += f'{i + 1}. "{item}"\n'
-            system_prompt += f"metadata: {metadata_entry}\n\n"
+        footnotes_metadata = results["metadatas"][0]
+        parts.extend(
+            f'{i}. "{item}"\nmetadata: {metadata_entry}\n\n'
+            for i, (item, metadata_entry) in enumerate(zip(results["documents"][0], footnotes_metadata), start=1)
+        )
 
     # Format footnotes from metadata
     footnotes = format_footnotes(footnotes_metadata)
-    system_prompt += f"Footnotes:\n{footnotes}\n"
+    parts.append(f"Footnotes:\n{footnotes}\n")
+    system_prompt = "".join(parts)
 
     # print(system_prompt)
     if logger.isEnabledFor(logging.DEBUG):
@@ -107,7 +122,7 @@ def search(
 
     if args.dry_run:
         logger.info("Dry run completed. Skipping search execution.")
-        exit(0)
+        return
 
     response = client_llm.chat.completions.create(
         model=model,
@@ -115,20 +130,24 @@ def search(
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": args.query},
         ],
+        stream=True,
     )
 
-    if len(response.choices) > 0:
-        markdown_content = (
-            response.choices[0].message.content
-            if response.choices[0].message.content
-            else "No content returned"
-        )
-        print_fancy_markdown(
-            markdown_content, "🤖 Agent Reply", borders_only="top_bottom"
-        )
+    # Rendered as it streams, so the answer starts showing after the first token
+    markdown_content = print_fancy_markdown_stream(
+        (
+            chunk.choices[0].delta.content
+            for chunk in response
+            if chunk.choices and chunk.choices[0].delta.content
+        ),
+        "🤖 Agent Reply",
+    )
+
+    if markdown_content:
+        if answer_cache is not None and query_embedding is not None:
+            answer_cache.put(args.collection, model, args.query, query_embedding, markdown_content)
     else:
-        print("No response from OpenAI API")
-        print(response)
+        print("No content returned")
 
 
 def process_search(
@@ -145,7 +164,8 @@ def process_search(
 
     client_llm = create_openai_client(args)
 
-    embedding_function = set_embedding_function(args)
+    # Wrapped here so the query embedded for the answer cache is reused by the search
+    embedding_function = CachingEmbeddingFunction(set_embedding_function(args))
 
     search(
         client_llm=client_llm,
@@ -0,0 +1,41 @@
+"""Socket.IO async mode selection for the web command.
+
+Kept apart from web.py so main() can import it, and monkey-patch for a
+green-thread mode, before any module that creates locks or sockets is
+loaded.
+"""
+
+import importlib.util
+import logging
+
+logger = logging.getLogger("RAG")
+
+
+def prepare_async_mode(async_mode: str, debug: bool = False) -> str:
+    """Monkey-patch the stdlib for green-thread async modes
+
+    "auto" picks eventlet, then gevent, and keeps threading (the Werkzeug
+    development server) only in debug mode or when neither is installed.
+    Falls back to threading when the requested package is not installed.
+    """
+    if async_mode == "auto":
+        if debug:
+            return "threading"
+        for candidate in ("eventlet", "gevent"):
+            if importlib.util.find_spec(candidate) is not None:
+                return prepare_async_mode(candidate)
+        logger.info("Neither eventlet nor gevent is installed, serving with the threading development server")
+        return "threading"
+    try:
+        if async_mode == "eventlet":
+            import eventlet  # type: ignore[import-not-found]
+
+            eventlet.monkey_patch()
+        elif async_mode == "gevent":
+            from gevent import monkey  # type: ignore[import-not-found]
+
+            monkey.patch_all()
+    except ImportError:
+        logger.warning(f"{async_mode} is not installed, falling back to threading async mode")
+        return "threading"
+    return async_mode
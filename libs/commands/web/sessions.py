@@ -0,0 +1,145 @@
+"""Per-sid chat session state for the web interface."""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("RAG")
+
+# A session state is {"current_chat_id": str|None, "conversation_history": deque,
+# "token_totals": {"user": int, "assistant": int}}
+SessionState = Dict[str, Any]
+
+
+class SessionStore:
+    """In-process session state, shared by all sockets of one worker"""
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._sessions.get(sid)
+            if state is not None:
+                self._last_seen[sid] = time.monotonic()
+            return state
+
+    def set(self, sid: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._sessions[sid] = state
+            self._last_seen[sid] = time.monotonic()
+
+    def update(
+        self, sid: str, apply: Callable[[SessionState], None], default: Callable[[], SessionState]
+    ) -> SessionState:
+        """Apply a change to the current state (default() if there is none) atomically, returns the result
+
+        apply may run more than once, so it must only mutate the state it is given.
+        """
+        with self._lock:
+            state = self._sessions.get(sid)
+            if state is None:
+                state = default()
+                self._sessions[sid] = state
+            apply(state)
+            self._last_seen[sid] = time.monotonic()
+            return state
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._last_seen.pop(sid, None)
+
+    def sweep(self, ttl: float) -> int:
+        """Drop sessions not used for ttl seconds, returns how many were dropped"""
+        cutoff = time.monotonic() - ttl
+        with self._lock:
+            stale = [sid for sid, seen in self._last_seen.items() if seen < cutoff]
+            for sid in stale:
+                self._sessions.pop(sid, None)
+                del self._last_seen[sid]
+        return len(stale)
+
+
+class RedisSessionStore(SessionStore):
+    """Session state kept in Redis so every worker behind a message queue sees it
+
+    States are stored as JSON under rag:session:<sid> and expire after ttl
+    seconds without a write. update() is an optimistic WATCH/MULTI transaction,
+    so concurrent turns on one sid from different workers don't lose history.
+    """
+
+    def __init__(self, url: str, max_history: Optional[int], ttl: float) -> None:
+        import redis  # type: ignore[import-not-found]
+
+        super().__init__()
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self.max_history = max_history
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(sid: str) -> str:
+        return f"rag:session:{sid}"
+
+    def _decode(self, raw: bytes) -> SessionState:
+        state = json.loads(raw)
+        state["conversation_history"] = deque(state["conversation_history"], maxlen=self.max_history)
+        return state
+
+    @staticmethod
+    def _encode(state: SessionState) -> str:
+        return json.dumps(dict(state, conversation_history=list(state["conversation_history"])))
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.get(self._key(sid))
+        return self._decode(raw) if raw is not None else None
+
+    def set(self, sid: str, state: Dict[str, Any]) -> None:
+        self._redis.set(self._key(sid), self._encode(state), ex=self.ttl)
+
+    def update(
+        self, sid: str, apply: Callable[[SessionState], None], default: Callable[[], SessionState]
+    ) -> SessionState:
+        key = self._key(sid)
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    # Another worker writing the key between WATCH and EXEC aborts the
+                    # transaction, and the change is re-applied to its state
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    state = self._decode(raw) if raw is not None else default()
+                    apply(state)
+                    pipe.multi()
+                    pipe.set(key, self._encode(state), ex=self.ttl)
+                    pipe.execute()
+                    return state
+                except self._watch_error:
+                    continue
+
+    def delete(self, sid: str) -> None:
+        self._redis.delete(self._key(sid))
+
+    def sweep(self, ttl: float) -> int:
+        # Redis expires idle sessions on its own
+        return 0
+
+
+def create_session_store(redis_url: Optional[str], max_history: Optional[int], ttl: float) -> SessionStore:
+    """Redis-backed store when a URL is configured and redis is installed, in-process otherwise
+
+    ttl is how long an idle session is kept: Redis expires keys after it, the
+    in-process store relies on the caller sweeping with the same value.
+    """
+    if redis_url:
+        try:
+            return RedisSessionStore(redis_url, max_history, ttl)
+        except ImportError:
+            logger.warning("redis is not installed, keeping web sessions in process")
+    return SessionStore()
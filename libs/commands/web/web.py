@@ -1,23 +1,136 @@
 import os
+import re
 import argparse
 import logging
+import textwrap
+import time
+import uuid
+import socket
+import threading
 import webbrowser
-from typing import List, Dict, Any, Optional, Callable, TypeVar, cast, Generator
-from functools import wraps
-from flask import Flask, jsonify, send_from_directory, request
-from flask_socketio import SocketIO, emit
-from flask_cors import CORS
-from engineio.payload import Payload
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, TypeVar, cast, Generator, Deque, Iterable, Tuple
+from functools import lru_cache, wraps
+from flask import Flask, Response, jsonify, send_from_directory, request, stream_with_context
 from chromadb.api import ClientAPI
+from chromadb.api.types import QueryResult
 from libs.commands.data_fill.embedding import set_embedding_function
-from libs.utils import format_footnotes, create_openai_client, get_tokenizer_for_model
+from libs.utils import format_footnotes, create_openai_client, get_token_counter
 from libs.models import get_best_model
 from libs.chat_storage import ChatStorage
+from libs.cache import CachingEmbeddingFunction, QueryCache
+from libs.commands.web.sessions import create_session_store
 
 logger = logging.getLogger("RAG")
 
-# Per-session chat state (sid -> {"current_chat_id": str|None, "conversation_history": list})
-chat_sessions = {}
+# Static instructions, sent as their own system message so OpenAI-compatible
+# servers can reuse the cached prefix across turns
+_SYSTEM_PREFIX = textwrap.dedent("""
+    ### Example
+    User: How can a coding buddy help with learning Rust?
+    
+    Answer:
+    A coding buddy can help you improve by providing feedback through code reviews and engaging in pair programming sessions [1]. They can also help you solidify your understanding of Rust by encouraging you to explain concepts aloud [2].
+    
+    Footnotes:
+    [1] "Find A Coding Buddy" in "Flattening Rust's Learning Curve | corrode Rust Consulting", `markdown.md`
+    [2] "Explain Rust Code To Non-Rust Developers" in "Flattening Rust's Learning Curve | corrode Rust Consulting", `markdown.md`
+    
+    ---
+    
+    You are a helpful assistant that answers questions strictly based on the provided documents.
+    
+    Each document includes:
+    - `text`: the paragraph or chunk content
+    - `sanitized_title`: the section this chunk belongs to
+    - `page_title`: the title of the entire markdown document
+    - `source`: the filename (e.g., markdown.md)
+    
+    When answering:
+    - Use only the provided document text — do not invent or guess.
+    - Use full sentences and clearly explained reasoning.
+    - Every factual statement must be annotated with a footnote reference like [1], [2], etc.
+    - Maintain conversation context from previous messages.
+    
+    Footnotes must:
+    - Be deduplicated
+    - Follow the format:
+      [1] "{section}" in "{page}", `{source}`
+    
+    VERY IMPORTANT:
+    - Your response must be nicely formatted in valid Markdown, with footnotes at the end of the answer
+    - Use text formatting like bold, italics, and code blocks as needed.
+    - Use quotes for direct citations from the documents.
+    - Use headings, lists, and other Markdown features to improve readability.
+    
+    If the documents do not answer the question, respond with: I don't know.
+    """).strip()
+
+_SUMMARY_SYSTEM_PROMPT = (
+    "You are a helpful assistant that creates concise but comprehensive summaries of conversations."
+)
+
+_SUMMARY_PROMPT_TEMPLATE = """Please provide a comprehensive summary of the following conversation. The summary should capture the key points, decisions made, and important information discussed. Make it concise but informative.
+
+Conversation:
+{conversation}
+
+Summary:"""
+
+# Streamed chunks are coalesced into one emit per this many chars or seconds
+CHUNK_FLUSH_CHARS = 64
+CHUNK_FLUSH_INTERVAL = 0.05
+
+# Document queries run off the request thread, one per concurrently streaming chat
+QUERY_WORKERS = 4
+
+# History entries carry a cached "_tokens" count next to "role" and "content"; the session's
+# token totals are kept in step with the history so token stats never rescan it
+
+
+# Longer texts (whole replies, pasted documents) rarely repeat and would pin
+# large strings in the memo, so they are counted directly
+TOKEN_CACHE_MAX_CHARS = 2048
+# Idle session states are dropped after SESSION_TTL seconds, checked every SESSION_SWEEP_INTERVAL
+SESSION_TTL = 1800
+SESSION_SWEEP_INTERVAL = 60
+# The collection handle is re-read at most every COLLECTION_REFRESH_INTERVAL seconds to
+# pick up data-fill generations, so cached query results may lag a data-fill by that long
+COLLECTION_REFRESH_INTERVAL = 30
+# Seconds to wait for the server to accept connections before giving up on --browser
+BROWSER_WAIT_TIMEOUT = 30
+# Formatted footnotes kept per set of footnote fields (titles and sources)
+FOOTNOTES_CACHE_SIZE = 256
+# Short nudges like "go on" or "why?" are answered from the previous turn's documents
+FOLLOWUP_MAX_CHARS = 30
+_FOLLOWUP_RE = re.compile(
+    r"(continue|go on|more|tell me more|explain( more| further)?|elaborate|why|how so|and)[.!?]*",
+    re.IGNORECASE,
+)
+# Built React frontend (yarn build in web/), relative to the project root
+WEB_BUILD_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "web",
+    "build",
+)
+
+
+@lru_cache(maxsize=4096)
+def _encode_len(count_fn: Callable[[str], int], text: str) -> int:
+    """Token count of text, memoized for repeated strings"""
+    return count_fn(text)
+
+
+def _token_role(message: Dict[str, Any]) -> str:
+    """Bucket a history entry into the user or assistant token total"""
+    return "user" if message["role"] == "user" else "assistant"
+
+
+def _is_followup(message: str) -> bool:
+    """Whether the message only asks to continue the previous answer"""
+    message = message.strip()
+    return len(message) < FOLLOWUP_MAX_CHARS and _FOLLOWUP_RE.fullmatch(message) is not None
 
 
 class WebChatManager:
@@ -29,7 +142,7 @@ class WebChatManager:
         client: ClientAPI,
     ):
         self.client = client
-        self.collection_name = args.collection_name
+        self.collection_name = args.collection
         self.llm = args.llm
         # Validate and get best available model
         self.model = get_best_model(
@@ -42,162 +155,235 @@ class WebChatManager:
         self.ollama_host = args.ollama_host
         self.ollama_port = args.ollama_port
         self.max_history = args.max_history
+        self.max_history_tokens = getattr(args, "max_history_tokens", 0)
+        self.followup_reuse = getattr(args, "followup_reuse", True)
 
         self.llm_client = create_openai_client(args)
-        self.embedding_function = set_embedding_function(args)
-        self.tokenizer = get_tokenizer_for_model(self.model)
+        # Repeated questions, also across restarts, skip the embedding call
+        self.embedding_function = CachingEmbeddingFunction(set_embedding_function(args))
+        # Chroma collection handles are safe to share across sessions; refreshed by _current_collection
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_function
+        )
+        self._collection_checked_at = time.monotonic()
+        # Resolved once (falling back to tiktoken, then the length estimate) so the
+        # per-chunk counting path has no try/except
+        self.token_counter = get_token_counter(self.model, getattr(args, "tokenizer", "tiktoken"))
+        self._count_fn: Callable[[str], int] = self.token_counter.count
         self.storage = ChatStorage(args.chat_db_path)
+        self.sessions = create_session_store(getattr(args, "redis_url", None), self.max_history, SESSION_TTL)
+        self.query_cache = QueryCache()
+        self._executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="rag-web-query")
+        self._footnotes_cache: "OrderedDict[Tuple[Tuple[Any, Any, Any], ...], str]" = OrderedDict()
+        self._footnotes_lock = threading.Lock()
+
+    def _new_history(self, entries: Iterable[Dict[str, Any]] = ()) -> Deque[Dict[str, Any]]:
+        """Conversation history that evicts its oldest entries beyond max_history"""
+        return deque(entries, maxlen=self.max_history)
+
+    def _new_session_state(
+        self, current_chat_id: Optional[str] = None, entries: Iterable[Dict[str, Any]] = ()
+    ) -> Dict[str, Any]:
+        conversation_history = self._new_history(entries)
+        token_totals = {"user": 0, "assistant": 0}
+        for message in conversation_history:
+            token_totals[_token_role(message)] += message["_tokens"]
+        session_state = {
+            "current_chat_id": current_chat_id,
+            "conversation_history": conversation_history,
+            "token_totals": token_totals,
+        }
+        self._enforce_token_budget(session_state)
+        return session_state
 
     def _get_session_state(self, sid: str) -> Dict[str, Any]:
-        if sid not in chat_sessions:
-            chat_sessions[sid] = {"current_chat_id": None, "conversation_history": []}
-        return chat_sessions[sid]
-
-    def _update_session_state(self, sid: str, current_chat_id: Optional[str], conversation_history: List[Dict[str, str]]):
-        chat_sessions[sid]["current_chat_id"] = current_chat_id
-        chat_sessions[sid]["conversation_history"] = conversation_history
+        """Current state of a session; a missing one is only stored by its first update"""
+        session_state = self.sessions.get(sid)
+        if session_state is None:
+            session_state = self._new_session_state()
+        return session_state
+
+    def _append_history(self, session_state: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """Append to the session history, keeping the token totals in step with evictions"""
+        conversation_history = session_state["conversation_history"]
+        token_totals = session_state["token_totals"]
+        if conversation_history.maxlen is not None and len(conversation_history) == conversation_history.maxlen:
+            evicted = conversation_history[0]
+            token_totals[_token_role(evicted)] -= evicted["_tokens"]
+        conversation_history.append(entry)
+        token_totals[_token_role(entry)] += entry["_tokens"]
+        self._enforce_token_budget(session_state)
+
+    def _enforce_token_budget(self, session_state: Dict[str, Any]) -> None:
+        """Drop the oldest messages until the history fits max_history_tokens (keeps the latest)"""
+        if not self.max_history_tokens:
+            return
+        conversation_history = session_state["conversation_history"]
+        token_totals = session_state["token_totals"]
+        while (
+            len(conversation_history) > 1
+            and token_totals["user"] + token_totals["assistant"] > self.max_history_tokens
+        ):
+            evicted = conversation_history.popleft()
+            token_totals[_token_role(evicted)] -= evicted["_tokens"]
 
     def _count_tokens(self, text: str) -> int:
         """Count tokens in text"""
-        try:
-            return len(self.tokenizer.encode(text))
-        except Exception:
-            # Fallback: rough estimation (1 token ≈ 4 characters)
-            return len(text) // 4
+        if self.token_counter.approx or len(text) > TOKEN_CACHE_MAX_CHARS:
+            return self._count_fn(text)
+        return _encode_len(self._count_fn, text)
+
+    def _count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for many texts in one call into the native tokenizer"""
+        return self.token_counter.count_batch(texts)
 
-    def count_conversation_tokens(self, sid: str) -> Dict[str, int]:
+    def _history_entry(self, role: str, content: str) -> Dict[str, Any]:
+        """Build a conversation history entry with its token count cached"""
+        return {"role": role, "content": content, "_tokens": self._count_tokens(content)}
+
+    def count_conversation_tokens(self, sid: str) -> Dict[str, Any]:
+        """Token usage of the session's history, flagged approx when estimated from text length"""
         session_state = self._get_session_state(sid)
-        conversation_history = session_state["conversation_history"]
-        total_tokens = 0
-        user_tokens = 0
-        assistant_tokens = 0
-        for message in conversation_history:
-            tokens = self._count_tokens(message["content"])
-            total_tokens += tokens
-            if message["role"] == "user":
-                user_tokens += tokens
-            else:
-                assistant_tokens += tokens
+        token_totals = session_state["token_totals"]
         return {
-            "total": total_tokens,
-            "user": user_tokens,
-            "assistant": assistant_tokens,
-            "messages": len(conversation_history),
+            "total": token_totals["user"] + token_totals["assistant"],
+            "user": token_totals["user"],
+            "assistant": token_totals["assistant"],
+            "messages": len(session_state["conversation_history"]),
+            "approx": self.token_counter.approx,
         }
 
-    def _build_system_prompt(self, results: Dict[str, Any]) -> str:
-        """Build system prompt with document context"""
-        system_prompt = """
-        ### Example
-        User: How can a coding buddy help with learning Rust?
-
-        Answer:
-        A coding buddy can help you improve by providing feedback through code reviews and engaging in pair programming sessions [1]. They can also help you solidify your understanding of Rust by encouraging you to explain concepts aloud [2].
-
-        Footnotes:
-        [1] "Find A Coding Buddy" in "Flattening Rust's Learning Curve | corrode Rust Consulting", `markdown.md`
-        [2] "Explain Rust Code To Non-Rust Developers" in "Flattening Rust's Learning Curve | corrode Rust Consulting", `markdown.md`
-
-        ---
-
-        You are a helpful assistant that answers questions strictly based on the provided documents.
-
-        Each document includes:
-        - `text`: the paragraph or chunk content
-        - `sanitized_title`: the section this chunk belongs to
-        - `page_title`: the title of the entire markdown document
-        - `source`: the filename (e.g., markdown.md)
-
-        When answering:
-        - Use only the provided document text — do not invent or guess.
-        - Use full sentences and clearly explained reasoning.
-        - Every factual statement must be annotated with a footnote reference like [1], [2], etc.
-        - Maintain conversation context from previous messages.
-
-        Footnotes must:
-        - Be deduplicated
-        - Follow the format:
-          [1] "{section}" in "{page}", `{source}`
-
-        VERY IMPORTANT:
-        - Your response must be nicely formatted in valid Markdown, with footnotes at the end of the answer
-        - Use text formatting like bold, italics, and code blocks as needed.
-        - Use quotes for direct citations from the documents.
-        - Use headings, lists, and other Markdown features to improve readability.
-
-        If the documents do not answer the question, respond with: I don't know.
-        """
-
+    def _build_system_prompt(self, results: QueryResult) -> str:
+        """Build the per-turn system message with document context"""
+        documents = results["documents"]
+        metadatas = results["metadatas"]
         footnotes_metadata = []
+        ctx_parts = []
 
         # Check if documents and metadatas are not None
-        if results["documents"] is not None and results["metadatas"] is not None:
-            for i, item in enumerate(results["documents"][0]):
-                metadata_entry = results["metadatas"][0][i]
-                footnotes_metadata.append(metadata_entry)
-
-                system_prompt += f'{i + 1}. "{item}"\n'
-                system_prompt += f"metadata: {metadata_entry}\n\n"
-
-        # Format footnotes from metadata
-        footnotes = format_footnotes(footnotes_metadata)
-        system_prompt += f"Footnotes:\n{footnotes}\n"
-
-        return system_prompt
+        if documents is not None and metadatas is not None:
+            docs, footnotes_metadata = documents[0], metadatas[0]
+            ctx_parts = [
+                f'{i}. "{doc}"\nmetadata: {meta}\n\n'
+                for i, (doc, meta) in enumerate(zip(docs, footnotes_metadata), start=1)
+            ]
+
+        # Format footnotes from metadata, reusing the text for a repeated document set
+        footnotes = self._format_footnotes_cached(footnotes_metadata)
+        ctx_parts.append(f"Footnotes:\n{footnotes}\n")
+
+        return "".join(ctx_parts)
+
+    def _format_footnotes_cached(self, metadatas: List[Any]) -> str:
+        # Keyed by the fields format_footnotes reads, so a refilled collection can't serve stale text
+        key = tuple((meta.get("sanitized_title"), meta.get("top_title"), meta.get("source")) for meta in metadatas)
+        with self._footnotes_lock:
+            footnotes = self._footnotes_cache.get(key)
+            if footnotes is not None:
+                self._footnotes_cache.move_to_end(key)
+                return footnotes
+        footnotes = format_footnotes(metadatas)
+        with self._footnotes_lock:
+            self._footnotes_cache[key] = footnotes
+            while len(self._footnotes_cache) > FOOTNOTES_CACHE_SIZE:
+                self._footnotes_cache.popitem(last=False)
+        return footnotes
 
     def generate_response_stream(self, sid: str, user_message: str) -> Generator[str, None, Optional[str]]:
         session_state = self._get_session_state(sid)
         current_chat_id = session_state["current_chat_id"]
-        conversation_history = session_state["conversation_history"]
-        conversation_history.append({"role": "user", "content": user_message})
+        if not self.client:
+            raise ValueError("ChromaDB client not initialized")
+        system_prompt = session_state.get("last_system_prompt")
+        future_results = None
+        if self.followup_reuse and system_prompt and _is_followup(user_message):
+            logger.debug("Follow-up message, reusing the previous turn's documents")
+        else:
+            # Embed and search while the message is counted and persisted
+            future_results = self._executor.submit(
+                self.query_cache.query, self._current_collection(), self.embedding_function, user_message
+            )
+        user_entry = self._history_entry("user", user_message)
         new_chat_id = None
         if self.storage:
-            new_chat_id = self._save_message(current_chat_id, "user", user_message)
+            new_chat_id = self._save_message(current_chat_id, "user", user_message, user_entry["_tokens"])
             if new_chat_id:
                 current_chat_id = new_chat_id
-        if not self.client:
-            raise ValueError("ChromaDB client not initialized")
-        collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            embedding_function=self.embedding_function
+        if future_results is not None:
+            system_prompt = self._build_system_prompt(future_results.result())
+
+        def record_user_turn(state: Dict[str, Any]) -> None:
+            self._append_history(state, user_entry)
+            state["current_chat_id"] = current_chat_id
+            state["last_system_prompt"] = system_prompt
+
+        # Applied atomically, so a turn of the same sid on another worker isn't overwritten
+        session_state = self.sessions.update(sid, record_user_turn, self._new_session_state)
+        conversation_history = session_state["conversation_history"]
+        messages = [
+            {"role": "system", "content": _SYSTEM_PREFIX},
+            {"role": "system", "content": system_prompt},
+        ]
+        messages.extend(
+            {"role": message["role"], "content": message["content"]}
+            for message in conversation_history
         )
-        results = collection.query(query_texts=[user_message], n_results=4)
-        results_dict: Dict[str, Any] = {
-            "documents": results["documents"],
-            "metadatas": results["metadatas"],
-            "ids": results["ids"],
-            "distances": results["distances"]
-        }
-        system_prompt = self._build_system_prompt(results_dict)
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
         response = self.llm_client.chat.completions.create(
-            model=self.model, messages=messages, stream=True  # type: ignore
+            model=self.model,
+            messages=messages,  # type: ignore
+            stream=True,
+            stream_options={"include_usage": True},
         )
         full_response = ""
+        usage = None
         try:
             for chunk in response:
+                # The usage chunk comes last and has no choices
+                if chunk.usage:
+                    usage = chunk.usage
                 if chunk.choices and chunk.choices[0].delta.content:
                     chunk_content = chunk.choices[0].delta.content
                     full_response += chunk_content
                     yield chunk_content
             if full_response:
-                conversation_history.append({"role": "assistant", "content": full_response})
-                self._save_message(current_chat_id, "assistant", full_response)
-                if len(conversation_history) > self.max_history:
-                    excess = len(conversation_history) - self.max_history
-                    conversation_history = conversation_history[excess:]
-            self._update_session_state(sid, current_chat_id, conversation_history)
+                # Prefer the server's count; tokenize locally only if the provider didn't report usage
+                response_tokens = (
+                    usage.completion_tokens if usage is not None else self._count_tokens(full_response)
+                )
+                assistant_entry = {"role": "assistant", "content": full_response, "_tokens": response_tokens}
+
+                def record_reply(state: Dict[str, Any]) -> None:
+                    if usage is not None:
+                        state["last_usage"] = {
+                            "prompt": usage.prompt_tokens,
+                            "completion": usage.completion_tokens,
+                        }
+                    self._append_history(state, assistant_entry)
+
+                self._save_message(current_chat_id, "assistant", full_response, response_tokens)
+                self.sessions.update(sid, record_reply, self._new_session_state)
             return new_chat_id
         except Exception as e:
             logger.error(f"Error generating streaming response: {e}")
             yield f"Error: {str(e)}"
             return None
 
+    def _current_collection(self) -> Any:
+        """The collection handle, re-read periodically so its metadata reflects data-fills"""
+        now = time.monotonic()
+        if now - self._collection_checked_at >= COLLECTION_REFRESH_INTERVAL:
+            self._collection_checked_at = now
+            try:
+                self.collection = self.client.get_collection(
+                    name=self.collection_name, embedding_function=self.embedding_function
+                )
+            except Exception as e:
+                logger.warning(f"Could not refresh collection '{self.collection_name}': {e}")
+        return self.collection
+
     def clear_conversation(self, sid: str):
-        session_state = self._get_session_state(sid)
-        session_state["conversation_history"] = []
-        session_state["current_chat_id"] = None
+        self.sessions.set(sid, self._new_session_state())
 
     def _load_chat_for_session(self, sid: str, chat_id: str) -> bool:
         if not self.storage:
@@ -205,14 +391,19 @@ class WebChatManager:
         chat = self.storage.get_chat(chat_id)
         if not chat:
             return False
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in chat.messages
-        ]
-        self._update_session_state(sid, chat_id, conversation_history)
+        # Stored counts are reused; only messages saved without one are tokenized
+        uncounted = [msg for msg in chat.messages if msg.token_count is None]
+        fresh = dict(zip((msg.id for msg in uncounted), self._count_tokens_batch([msg.content for msg in uncounted])))
+        counts = [fresh.get(msg.id, msg.token_count) for msg in chat.messages]
+        self.sessions.set(sid, self._new_session_state(chat_id, (
+            {"role": msg.role, "content": msg.content, "_tokens": tokens}
+            for msg, tokens in zip(chat.messages, counts)
+        )))
         return True
 
-    def _save_message(self, current_chat_id: Optional[str], role: str, content: str) -> Optional[str]:
+    def _save_message(
+        self, current_chat_id: Optional[str], role: str, content: str, token_count: Optional[int] = None
+    ) -> Optional[str]:
         if not self.storage:
             return None
         new_chat_id = None
@@ -222,7 +413,7 @@ class WebChatManager:
             title = (trimmed[:100].rstrip() + "...") if len(trimmed) > 100 else trimmed
             current_chat_id = self.storage.create_chat(title)
             new_chat_id = current_chat_id
-        self.storage.add_message(current_chat_id, role, content)
+        self.storage.add_message(current_chat_id, role, content, token_count=token_count)
         return new_chat_id
 
     def get_config(self) -> Dict[str, Any]:
@@ -241,25 +432,17 @@ class WebChatManager:
             return "No messages to summarize."
 
         # Build conversation text for summarization
-        conversation_text = ""
-        for msg in messages:
-            role = "User" if msg.role == "user" else "Assistant"
-            conversation_text += f"{role}: {msg.content}\n\n"
-
-        # Create prompt for summarization
-        summary_prompt = f"""Please provide a comprehensive summary of the following conversation. The summary should capture the key points, decisions made, and important information discussed. Make it concise but informative.
-
-Conversation:
-{conversation_text}
-
-Summary:"""
+        conversation_text = "".join(
+            f"{'User' if msg.role == 'user' else 'Assistant'}: {msg.content}\n\n" for msg in messages
+        )
+        summary_prompt = _SUMMARY_PROMPT_TEMPLATE.format(conversation=conversation_text)
 
         try:
             # Generate summary using LLM
             response = self.llm_client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates concise but comprehensive summaries of conversations."},
+                    {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
                     {"role": "user", "content": summary_prompt}
                 ],
                 max_tokens=1000,
@@ -294,6 +477,8 @@ def _require_chat_manager(f: RouteFunc) -> RouteFunc:
 
 def _configure_cors(app: Flask, cors_origins: str, port: int, host: str) -> None:
     """Configure CORS settings for the Flask app"""
+    from flask_cors import CORS
+
     if cors_origins:
         # Use custom CORS origins if provided
         allowed_origins = [origin.strip() for origin in cors_origins.split(",") if origin.strip()]
@@ -306,7 +491,15 @@ def _configure_cors(app: Flask, cors_origins: str, port: int, host: str) -> None
             "*"  # Allow all origins when binding to 0.0.0.0
         ]
 
-    CORS(app, origins=allowed_origins, supports_credentials=True)
+    # A wildcard already matches everything, so skip matching the specific origins
+    if "*" in allowed_origins:
+        allowed_origins = ["*"]
+    else:
+        allowed_origins = list(dict.fromkeys(origin.lower() for origin in allowed_origins))
+
+    # Only the API needs CORS headers; static assets and index.html skip the hook
+    # and Socket.IO checks origins itself via cors_allowed_origins
+    CORS(app, resources={r"/api/*": {"origins": allowed_origins}}, supports_credentials=True)
 
 
 def _initialize_chat_manager(
@@ -378,6 +571,16 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
         chat_id = request.args.get("chat_id")
         if not chat_id or not chat_manager.storage:  # type: ignore[attr-defined]
             return jsonify({"total": 0, "user": 0, "assistant": 0, "messages": 0})
+        # Token counts stored with the messages are summed in SQL, no tokenizer calls
+        usage = chat_manager.storage.get_token_usage(chat_id)  # type: ignore[attr-defined]
+        if usage["messages"] and not usage["uncounted"]:
+            return jsonify({
+                "total": usage["user"] + usage["assistant"],
+                "user": usage["user"],
+                "assistant": usage["assistant"],
+                "messages": usage["messages"],
+                "approx": chat_manager.token_counter.approx,  # type: ignore[union-attr]
+            })
         chat = chat_manager.storage.get_chat(chat_id)  # type: ignore[attr-defined]
         if not chat:
             return jsonify({"total": 0, "user": 0, "assistant": 0, "messages": 0})
@@ -385,8 +588,8 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
         total_tokens = 0
         user_tokens = 0
         assistant_tokens = 0
-        for msg in chat.messages:
-            tokens = chat_manager._count_tokens(msg.content)  # type: ignore[attr-defined]
+        counts = chat_manager._count_tokens_batch([msg.content for msg in chat.messages])  # type: ignore[attr-defined]
+        for msg, tokens in zip(chat.messages, counts):
             total_tokens += tokens
             if msg.role == "user":
                 user_tokens += tokens
@@ -396,7 +599,8 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
             "total": total_tokens,
             "user": user_tokens,
             "assistant": assistant_tokens,
-            "messages": len(chat.messages)
+            "messages": len(chat.messages),
+            "approx": chat_manager.token_counter.approx,  # type: ignore[union-attr]
         })
 
     @app.route("/api/history")
@@ -413,17 +617,69 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
             for msg in chat.messages
         ]})
 
+    @app.route("/api/stream", methods=["POST"])
+    @_require_chat_manager
+    def stream_message() -> Any:
+        """Stream a response as server-sent events
+
+        Expects {"message": str, "session_id": str, "chat_id": str (optional)};
+        passing the Socket.IO sid as session_id shares conversation history with
+        the socket session, and chat_id switches the session to a stored chat first.
+        """
+        data = request.get_json(silent=True) or {}
+        user_message = (data.get("message") or "").strip()
+        sid = data.get("session_id")
+        chat_id = data.get("chat_id")
+        if not user_message or not sid:
+            return jsonify({"error": "message and session_id are required"}), 400
+        if chat_id and chat_manager._get_session_state(sid)["current_chat_id"] != chat_id:  # type: ignore[union-attr]
+            if not chat_manager._load_chat_for_session(sid, chat_id):  # type: ignore[union-attr]
+                return jsonify({"error": "Chat not found"}), 404
+
+        def events() -> Generator[str, None, None]:
+            stream = chat_manager.generate_response_stream(sid, user_message)  # type: ignore[union-attr]
+            new_chat_id = None
+            try:
+                while True:
+                    yield f"data: {app.json.dumps({'chunk': next(stream)})}\n\n"
+            except StopIteration as e:
+                new_chat_id = e.value
+            except Exception as e:
+                logger.error(f"Error in SSE stream: {e}")
+                yield f"event: error\ndata: {app.json.dumps({'error': str(e)})}\n\n"
+                return
+            complete = {
+                "status": "complete",
+                "tokens": chat_manager.count_conversation_tokens(sid),  # type: ignore[union-attr]
+                "newChatId": new_chat_id,
+            }
+            yield f"event: complete\ndata: {app.json.dumps(complete)}\n\n"
+
+        return Response(
+            stream_with_context(events()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.route("/api/clear", methods=["POST"])
     @_require_chat_manager
     def clear_chat() -> Any:
-        """Clear conversation history"""
-        chat_manager.clear_conversation()  # type: ignore[attr-defined]
+        """Clear the conversation history of {"session_id": str}"""
+        sid = (request.get_json(silent=True) or {}).get("session_id")
+        if not sid:
+            return jsonify({"error": "session_id is required"}), 400
+        chat_manager.clear_conversation(sid)  # type: ignore[attr-defined]
         return jsonify({"status": "cleared"})
 
     @app.route("/api/chats/<chat_id>/summarize", methods=["POST"])
     @_require_chat_manager
     def summarize_chat(chat_id: str) -> Any:
-        """Summarize and compact a chat conversation"""
+        """Summarize and compact a chat conversation
+
+        With ?async=1 the LLM call runs as a Socket.IO background task: the
+        route answers 202 with a task_id and the result is emitted as
+        summary_ready to the requesting socket, given as ?sid=<socket sid>.
+        """
         if not chat_manager.storage:  # type: ignore[attr-defined]
             return jsonify({"success": False, "error": "Storage not available"}), 500
 
@@ -434,23 +690,44 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
         if len(chat.messages) < 2:
             return jsonify({"success": False, "error": "Not enough messages to summarize"}), 400
 
+        async_summary = request.args.get("async") in ("1", "true")
+        sid = request.args.get("sid")
+        if async_summary and not sid:
+            # Without a sid the summary would be broadcast to every connected client
+            return jsonify({"success": False, "error": "sid is required with async=1"}), 400
+
+        if async_summary:
+            task_id = uuid.uuid4().hex
+            socketio = getattr(app, "socketio")
+
+            def run_summary() -> None:
+                body, _ = _summarize(chat_id, chat.messages)
+                socketio.emit("summary_ready", {"task_id": task_id, "chat_id": chat_id, **body}, to=sid)
+
+            socketio.start_background_task(run_summary)
+            return jsonify({"success": True, "task_id": task_id}), 202
+
+        body, status = _summarize(chat_id, chat.messages)
+        return jsonify(body), status
+
+    def _summarize(chat_id: str, messages: List[Any]) -> Tuple[Dict[str, Any], int]:
         try:
             # Generate summary using LLM
-            summary = chat_manager._generate_chat_summary(chat.messages)  # type: ignore[attr-defined]
+            summary = chat_manager._generate_chat_summary(messages)  # type: ignore[attr-defined]
 
             # Replace all messages with the summary
             success = chat_manager.storage.replace_with_summary(chat_id, summary)  # type: ignore[attr-defined]
 
             if not success:
-                return jsonify({"success": False, "error": "Failed to replace messages with summary"}), 500
+                return {"success": False, "error": "Failed to replace messages with summary"}, 500
 
-            return jsonify({
+            return {
                 "success": True,
                 "history": [{"role": "assistant", "content": summary}]
-            })
+            }, 200
         except Exception as e:
             logger.error(f"Error summarizing chat: {e}")
-            return jsonify({"success": False, "error": str(e)}), 500
+            return {"success": False, "error": str(e)}, 500
 
     # React app routes - must come after API routes
     @app.route("/")
@@ -473,16 +750,70 @@ def setup_routes(app: Flask) -> None:  # noqa: C901
         return send_from_directory(index_folder, "index.html")
 
 
+def _configure_json(app: Flask) -> Optional[Any]:
+    """Switch Flask and Socket.IO JSON to orjson when it is installed
+
+    Returns the object to pass as SocketIO(json=...), or None to keep the
+    stdlib json module.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    class OrjsonModule:
+        """json-module shaped wrapper; Socket.IO expects dumps() to return str"""
+
+        @staticmethod
+        def dumps(obj: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        @staticmethod
+        def loads(s: str | bytes, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+    return OrjsonModule
+
+
+def _serve_static_with_whitenoise(app: Flask, static_folder_path: str) -> None:
+    """Serve /static through WhiteNoise when installed
+
+    WhiteNoise keeps file metadata in memory, serves precompressed .gz/.br
+    variants and marks the hashed React bundle files as immutable. Without
+    it Flask keeps serving the static folder itself.
+    """
+    try:
+        from whitenoise import WhiteNoise  # type: ignore[import-not-found]
+    except ImportError:
+        logger.debug("whitenoise not installed, serving static files through Flask")
+        return
+
+    app.wsgi_app = WhiteNoise(  # type: ignore[method-assign]
+        app.wsgi_app,
+        root=static_folder_path,
+        prefix="static/",
+        immutable_file_test=r"\.[0-9a-f]{8,}\.",
+    )
+
+
 def create_app(
     client: ClientAPI,
     args: argparse.Namespace,
 ) -> Flask:  # noqa: C901
     """Create and configure Flask app"""
-    import os
-    # Get the absolute path to the static folder relative to the project root
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(current_dir)
-    static_folder_path = os.path.join(project_root, "web", "build", "static")
+    # Imported here so Socket.IO loads after prepare_async_mode has patched
+    from flask_socketio import SocketIO, emit
+
+    static_folder_path = os.path.join(WEB_BUILD_PATH, "static")
     print(f"Static folder path: {static_folder_path}")
     print(f"Static folder exists: {os.path.exists(static_folder_path)}")
     app = Flask(__name__, static_folder=static_folder_path, static_url_path="/static")
@@ -492,6 +823,14 @@ def create_app(
     app.config["PROPAGATE_EXCEPTIONS"] = True
     if args.debug:
         app.config["DEBUG"] = True  # Enable Flask debug mode when requested
+    else:
+        # Keep per-packet and per-request logging off the streaming path
+        for noisy_logger in ["engineio", "socketio", "werkzeug"]:
+            logging.getLogger(noisy_logger).setLevel(logging.WARNING)
+
+    _serve_static_with_whitenoise(app, static_folder_path)
+
+    socketio_json = _configure_json(app)
 
     # Configure CORS
     _configure_cors(app, args.cors_origins, args.port, args.host)
@@ -500,14 +839,18 @@ def create_app(
     socketio = SocketIO(
         app,
         cors_allowed_origins="*",
-        async_mode='threading',
+        # Unresolved "auto" (create_app used without main) means nothing was monkey-patched
+        async_mode="threading" if getattr(args, "async_mode", "auto") == "auto" else args.async_mode,
         ping_timeout=args.timeout,
         ping_interval=25,
         max_http_buffer_size=16 * 1024 * 1024,  # 16MB max WebSocket message size
         always_connect=True,
         logger=True if args.debug else False,  # Only enable socket logging in debug mode
         engineio_logger=True if args.debug else False,  # Only enable engine logging in debug mode
-        manage_session=False  # Disable session management for development
+        manage_session=False,  # Disable session management for development
+        json=socketio_json,
+        # Fans emits out across workers; session state is shared through the same Redis
+        message_queue=getattr(args, "redis_url", None) or None,
     )
 
     # Initialize chat manager
@@ -519,15 +862,24 @@ def create_app(
     # Set up routes
     setup_routes(app)
 
+    def sweep_sessions():
+        """Periodically drop session states of clients that went away without disconnecting"""
+        while True:
+            socketio.sleep(SESSION_SWEEP_INTERVAL)
+            if chat_manager is not None:
+                dropped = chat_manager.sessions.sweep(SESSION_TTL)
+                if dropped:
+                    logger.debug(f"Dropped {dropped} idle web sessions")
+
+    socketio.start_background_task(sweep_sessions)
+
     @socketio.on("reset_chat")
     def handle_reset_chat():
         from flask import request  # type: ignore[import]
         sid = request.sid  # type: ignore[attr-defined]
-        if sid not in chat_sessions:
-            chat_sessions[sid] = {"current_chat_id": None, "conversation_history": []}
-        else:
-            chat_sessions[sid]["current_chat_id"] = None
-            chat_sessions[sid]["conversation_history"] = []
+        # A fresh session state is created on the next message
+        if chat_manager is not None:
+            chat_manager.sessions.delete(sid)
         emit("chat_reset", {"status": "reset"})
 
     @socketio.on("switch_chat")
@@ -560,8 +912,20 @@ def create_app(
                 return
             stream = chat_manager.generate_response_stream(sid, user_message)
             new_chat_id = None
+            buffer: List[str] = []
+            buffered_chars = 0
+            last_flush = time.monotonic()
             for chunk in stream:
-                emit("message_chunk", {"chunk": chunk})
+                buffer.append(chunk)
+                buffered_chars += len(chunk)
+                now = time.monotonic()
+                if buffered_chars >= CHUNK_FLUSH_CHARS or now - last_flush >= CHUNK_FLUSH_INTERVAL:
+                    emit("message_chunk", {"chunk": "".join(buffer)})
+                    buffer.clear()
+                    buffered_chars = 0
+                    last_flush = now
+            if buffer:
+                emit("message_chunk", {"chunk": "".join(buffer)})
             try:
                 new_chat_id = stream.send(None)
             except StopIteration as e:
@@ -575,11 +939,11 @@ def create_app(
                 "newChatId": new_chat_id
             })
             if new_chat_id is None and session_state["current_chat_id"]:
-                chat = chat_manager.storage.get_chat(session_state["current_chat_id"]) if chat_manager.storage else None
-                if chat and chat.title == "New Chat":
+                storage = chat_manager.storage
+                if storage and storage.get_chat_title(session_state["current_chat_id"]) == "New Chat":
                     trimmed = user_message.strip().replace('\n', ' ')
                     title = (trimmed[:100].rstrip() + "...") if len(trimmed) > 100 else trimmed
-                    chat_manager.storage.update_chat_title(session_state["current_chat_id"], title)
+                    storage.update_chat_title(session_state["current_chat_id"], title)
                     emit("chat_title_updated", {"chatId": session_state["current_chat_id"], "title": title})
         except Exception as e:
             logger.error(f"Error in message handling: {e}")
@@ -594,7 +958,10 @@ def create_app(
     @socketio.on("disconnect")
     def handle_disconnect(_unused=None):
         """Handle client disconnection"""
+        from flask import request  # type: ignore[import]
         logger.info("Client disconnected from WebSocket")
+        if chat_manager is not None:
+            chat_manager.sessions.delete(request.sid)  # type: ignore[attr-defined]
 
     @socketio.on_error()
     def handle_error(e):
@@ -613,20 +980,38 @@ def create_app(
     return app
 
 
+def _open_browser_when_listening(url: str, host: str, port: int, timeout: float = BROWSER_WAIT_TIMEOUT) -> None:
+    """Open url in the browser as soon as host:port accepts connections"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        logger.warning(f"Web server not listening on port {port} after {timeout}s, not opening the browser")
+        return
+    logger.debug(f"Opening browser to {url}")
+    webbrowser.open(url)
+
+
 def process_web(
     args: argparse.Namespace,
     client: ClientAPI,
 ) -> None:
     """Process web command"""
     # Check if web interface is available
-    import os
-    web_build_path = os.path.join(os.path.dirname(__file__), '..', 'web', 'build')
-    if not os.path.exists(web_build_path):
+    if not os.path.exists(WEB_BUILD_PATH):
         logger.warning("Web interface build not found. Please ensure the web interface is built.")
         logger.info("Web interface will not be available")
         return
 
-    logger.info(f"Starting web interface for collection '{args.collection_name}'")
+    logger.info(f"Starting web interface for collection '{args.collection}'")
+
+    # main() has already resolved the mode and monkey-patched for green threads;
+    # with workers > 1 run under gunicorn with the matching worker class instead
+    logger.debug(f"Using Socket.IO async mode '{args.async_mode}'")
 
     app = create_app(
         args=args,
@@ -640,10 +1025,12 @@ def process_web(
     if args.browser:
         # Always use localhost for browser, regardless of host binding
         url = f"http://localhost:{args.port}"
-        logger.debug(f"Opening browser to {url}")
-        webbrowser.open(url)
+        # Opened from a background task once the port accepts connections, so the
+        # browser's first request doesn't race the server start
+        getattr(app, "socketio").start_background_task(_open_browser_when_listening, url, "localhost", args.port)
 
     # Configure Engine.IO for development
+    from engineio.payload import Payload
     Payload.max_decode_packets = 1000  # Increased for development to help with debugging
 
     # Run the app with SocketIO
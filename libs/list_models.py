@@ -1,5 +1,10 @@
 import argparse
+import json
 import logging
+import os
+import threading
+import time
+from pathlib import Path
 from typing import List, Dict, Optional
 from rich.console import Console
 from rich.table import Table
@@ -14,6 +19,11 @@ console = Console()
 # Cache for models
 _cached_models: Dict[str, List[Dict]] = {}
 _model_manager: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
+
+# Model lists persisted between runs, so short CLI invocations skip the probe
+MODELS_CACHE_DIR = Path.home() / ".cache" / "rag" / "models"
+MODELS_CACHE_TTL = 60
 
 
 def initialize_model_manager(host: str = "127.0.0.1", port: int = 11434) -> None:
@@ -24,8 +34,10 @@ def initialize_model_manager(host: str = "127.0.0.1", port: int = 11434) -> None
         port: Ollama port number
     """
     global _model_manager
-    if _model_manager is None:
-        _model_manager = get_model_manager(host, port)
+    # Pre-caching probes providers from several threads at once
+    with _model_manager_lock:
+        if _model_manager is None:
+            _model_manager = get_model_manager(host, port)
 
 
 def get_cached_models(provider: str) -> Optional[List[Dict]]:
@@ -40,17 +52,52 @@ def get_cached_models(provider: str) -> Optional[List[Dict]]:
     return _cached_models.get(provider)
 
 
+def _models_cache_path(provider: str, host: str, port: int) -> Path:
+    return MODELS_CACHE_DIR / f"{provider}-{host}-{port}.json"
+
+
+def _read_models_cache(path: Path) -> Optional[List[Dict]]:
+    """Return the model list stored at path if it is younger than MODELS_CACHE_TTL"""
+    try:
+        if time.time() - path.stat().st_mtime > MODELS_CACHE_TTL:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_models_cache(path: Path, models: List[Dict]) -> None:
+    """Atomically replace the model list stored at path"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(models, f, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Could not write models cache {path}: {e}")
+
+
 def process_list_models(args: argparse.Namespace, force_refresh: bool = False) -> Optional[List[Dict]]:
 
     # Check cache first unless force refresh requested
     if not force_refresh and args.provider in _cached_models:
         logger.debug(f"Using cached models for {args.provider}")
         models = _cached_models[args.provider]
-        if not args.silent:
+        if not getattr(args, "silent", False):
             _display_models_table(args.provider, models)
             _display_default_models(args.provider, _model_manager)
         return models
 
+    cache_path = _models_cache_path(args.provider, args.ollama_host, args.ollama_port)
+    if not force_refresh:
+        models = _read_models_cache(cache_path)
+        if models:
+            logger.debug(f"Using models for {args.provider} cached in {cache_path}")
+            _cached_models[args.provider] = models
+            return models
+
     logger.debug(f"Verifying models for {args.provider}")
 
     try:
@@ -67,8 +114,12 @@ def process_list_models(args: argparse.Namespace, force_refresh: bool = False) -
 
         # Cache the models
         _cached_models[args.provider] = models
+        _write_models_cache(cache_path, models)
 
         logger.debug(f"Successfully verified {len(models)} models for {args.provider}")
+        if not getattr(args, "silent", False):
+            _display_models_table(args.provider, models)
+            _display_default_models(args.provider, _model_manager)
         return models
 
     except Exception as e:
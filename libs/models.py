@@ -1,14 +1,24 @@
 import os
 import logging
-from typing import Dict, List, Optional
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import ollama
 import openai
 from google.ai import generativelanguage as glanguage
 from google.api_core import client_options
 
+from libs.utils import get_shared_http_client
+
 logger = logging.getLogger("RAG")
 
 
+@lru_cache(maxsize=4)
+def _get_ollama_client(base_url: str) -> ollama.Client:
+    """Ollama client shared per server, so repeated listings reuse its connections"""
+    return ollama.Client(host=base_url)
+
+
 class ModelDefaults:
     """Default models for each LLM provider"""
 
@@ -150,7 +160,7 @@ class ModelManager:
         """List Ollama models"""
         try:
             base_url = f"http://{self.ollama_host}:{self.ollama_port}"
-            client = ollama.Client(host=base_url)
+            client = _get_ollama_client(base_url)
             response = client.list()
 
             # Format the response to match other providers
@@ -204,7 +214,7 @@ class ModelManager:
                 logger.error("OPENAI_API_KEY not found in environment")
                 return []
 
-            client = openai.OpenAI(api_key=api_key)
+            client = openai.OpenAI(api_key=api_key, http_client=get_shared_http_client())
             models = client.models.list()
 
             # Format the response
@@ -267,6 +277,10 @@ class ModelManager:
 # Singleton instance
 _model_manager_instance: Optional[ModelManager] = None
 
+# get_best_model results: (provider, host, port, model, type) -> (expires_at, model)
+BEST_MODEL_TTL = 300
+_best_model_cache: Dict[Tuple, Tuple[float, str]] = {}
+
 
 def get_model_manager(
     ollama_host: str, ollama_port: int
@@ -314,6 +328,16 @@ def get_best_model(
     
     For embedding operations, use embedding_ollama_host:embedding_ollama_port
     For LLM operations, use ollama_host:ollama_port
+
+    Results are cached for BEST_MODEL_TTL seconds, so repeated lookups skip
+    the provider's model listing call.
     """
+    key = (provider, ollama_host, ollama_port, model_name, model_type)
+    cached = _best_model_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
     manager = get_model_manager(ollama_host, ollama_port)
-    return manager.get_validated_model(provider, model_name, model_type)
+    model = manager.get_validated_model(provider, model_name, model_type)
+    _best_model_cache[key] = (time.monotonic() + BEST_MODEL_TTL, model)
+    return model
@@ -2,12 +2,7 @@ import logging
 from typing import List, Optional, Any, Tuple, cast, Literal
 from dataclasses import dataclass
 from openai import OpenAI
-from openai.types.chat import (
-    ChatCompletionMessageParam,
-    ChatCompletionSystemMessageParam,
-    ChatCompletionUserMessageParam,
-    ChatCompletionAssistantMessageParam,
-)
+from openai.types.chat import ChatCompletionMessageParam
 from chromadb.api import ClientAPI
 from chromadb.api.types import QueryResult
 
@@ -17,7 +12,6 @@ logger = logging.getLogger("RAG")
 MessageRole = Literal["system", "user", "assistant"]
 Message = ChatCompletionMessageParam
 
-
 @dataclass
 class SearchIteration:
     """Represents a single search iteration"""
@@ -124,17 +118,11 @@ class RAGOrchestrator:
             response = self.llm_client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    cast(
-                        ChatCompletionSystemMessageParam,
-                        {
-                            "role": "system",
-                            "content": "You are a search quality analyst. Provide exact format as requested.",
-                        },
-                    ),
-                    cast(
-                        ChatCompletionUserMessageParam,
-                        {"role": "user", "content": evaluation_prompt},
-                    ),
+                    {
+                        "role": "system",
+                        "content": "You are a search quality analyst. Provide exact format as requested.",
+                    },
+                    {"role": "user", "content": evaluation_prompt},
                 ],
             )
 
@@ -281,11 +269,7 @@ class RAGOrchestrator:
         """
         try:
             # Add user message to history
-            self.conversation_history.append(
-                cast(
-                    ChatCompletionUserMessageParam, {"role": "user", "content": message}
-                )
-            )
+            self.conversation_history.append({"role": "user", "content": message})
 
             # Perform iterative search for relevant context
             search_result = self.search(message)
@@ -308,10 +292,7 @@ class RAGOrchestrator:
 
             # Prepare messages for LLM
             messages: List[ChatCompletionMessageParam] = [
-                cast(
-                    ChatCompletionSystemMessageParam,
-                    {"role": "system", "content": system_prompt},
-                )
+                {"role": "system", "content": system_prompt}
             ]
             messages.extend(self.conversation_history)
 
@@ -323,10 +304,7 @@ class RAGOrchestrator:
             if response.choices and response.choices[0].message.content:
                 assistant_message = response.choices[0].message.content
                 self.conversation_history.append(
-                    cast(
-                        ChatCompletionAssistantMessageParam,
-                        {"role": "assistant", "content": assistant_message},
-                    )
+                    {"role": "assistant", "content": assistant_message}
                 )
                 return assistant_message
 
@@ -1,13 +1,179 @@
+import json
 import logging
+import re
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Optional, Any, Tuple, cast
 from dataclasses import dataclass
+import tiktoken
 from openai import OpenAI
 from chromadb.api import ClientAPI
 from chromadb.api.types import QueryResult
+from .cache import (
+    CachingEmbeddingFunction,
+    Evaluation,
+    EvaluationCache,
+    make_evaluation_key,
+)
 
 
 logger = logging.getLogger("RAG")
 
+# Shared, read-only empty QueryResult for failed searches
+_EMPTY_RESULT = cast(
+    QueryResult,
+    MappingProxyType(
+        {
+            "ids": ((),),
+            "embeddings": None,
+            "documents": ((),),
+            "metadatas": ((),),
+            "distances": ((),),
+        }
+    ),
+)
+
+EVALUATION_SYSTEM_PROMPT = """You are an expert search quality analyst. You will be given a search query, the search iteration number and the context returned by the search.
+
+Respond with a JSON object containing:
+- "score": relevance score between 0.0 and 1.0 (where 1.0 is perfect relevance)
+- "refined_query": a refined search query that would get better results, or null if current results are optimal
+- "alternative_queries": a few other distinct refined queries worth trying, best first (empty list if none)
+- "analysis": brief analysis of why this score was given
+"""
+
+EVALUATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "evaluation",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "number"},
+                "refined_query": {"type": ["string", "null"]},
+                "alternative_queries": {"type": "array", "items": {"type": "string"}},
+                "analysis": {"type": "string"},
+            },
+            "required": ["score", "refined_query", "alternative_queries", "analysis"],
+        },
+    },
+}
+
+# Token budget for each document snippet shown to the evaluator
+SNIPPET_TOKENS = 80
+
+
+@lru_cache(maxsize=1)
+def _snippet_encoder() -> Optional[tiktoken.Encoding]:
+    """Get the tokenizer used to truncate evaluation snippets (None if unavailable)"""
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for snippets, falling back to characters: {e}")
+        return None
+
+
+def _truncate_snippet(text: str, max_tokens: int = SNIPPET_TOKENS) -> str:
+    """Truncate text to max_tokens tokens, appending '...' when cut"""
+    encoder = _snippet_encoder()
+    if encoder is None:
+        return f"{text[:200]}..." if len(text) > 200 else text
+    tokens = encoder.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens]) + "..."
+
+
+_RESPONSE_FIELD_RE = re.compile(
+    r"^(SCORE|ANALYSIS|REFINED_QUERY):\s*(.*?)\s*$", re.MULTILINE
+)
+
+
+# Fields of a partially streamed JSON evaluation
+_STREAM_SCORE_RE = re.compile(r'"score"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}]')
+_STREAM_REFINED_QUERY_RE = re.compile(
+    r'"refined_query"\s*:\s*(null|"(?:[^"\\]|\\.)*")\s*[,}]'
+)
+_STREAM_ALTERNATIVES_RE = re.compile(
+    r'"alternative_queries"\s*:\s*(\[(?:[^\]"]|"(?:[^"\\]|\\.)*")*\])'
+)
+_STREAM_ANALYSIS_RE = re.compile(r'"analysis"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+def _close_partial_json(buffer: str) -> str:
+    """
+    Complete a JSON evaluation whose stream was closed early, keeping
+    whatever part of the analysis had been received
+    """
+    score_match = _STREAM_SCORE_RE.search(buffer)
+    refined_match = _STREAM_REFINED_QUERY_RE.search(buffer)
+    alternatives_match = _STREAM_ALTERNATIVES_RE.search(buffer)
+    analysis_match = _STREAM_ANALYSIS_RE.search(buffer)
+
+    analysis = "Analysis skipped, evaluation stream closed early"
+    if analysis_match is not None:
+        raw = analysis_match.group(1).rstrip("\\")
+        try:
+            analysis = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            analysis = raw
+
+    return json.dumps(
+        {
+            "score": float(score_match.group(1)) if score_match else 0.0,
+            "refined_query": json.loads(refined_match.group(1))
+            if refined_match
+            else None,
+            "alternative_queries": json.loads(alternatives_match.group(1))
+            if alternatives_match
+            else [],
+            "analysis": analysis,
+        }
+    )
+
+
+def _parse_evaluation(content: str, query: str) -> Evaluation:
+    """
+    Parse an evaluation response
+    Expects JSON, falls back to SCORE/ANALYSIS/REFINED_QUERY lines for
+    providers that ignore response_format
+    """
+    try:
+        data = json.loads(content, strict=False)
+    except json.JSONDecodeError:
+        data = None
+
+    alternatives: Tuple[str, ...] = ()
+    if isinstance(data, dict):
+        if isinstance(data.get("alternative_queries"), list):
+            alternatives = tuple(
+                q.strip() for q in data["alternative_queries"] if isinstance(q, str)
+            )
+        fields = {
+            "SCORE": data.get("score"),
+            "ANALYSIS": data.get("analysis"),
+            "REFINED_QUERY": data.get("refined_query"),
+        }
+    else:
+        fields = {
+            m.group(1): m.group(2) for m in _RESPONSE_FIELD_RE.finditer(content)
+        }
+
+    try:
+        score = float(fields.get("SCORE") or 0.0)
+    except (TypeError, ValueError):
+        score = 0.0
+
+    analysis = fields.get("ANALYSIS") or "No analysis provided"
+    refined_query = str(fields.get("REFINED_QUERY") or query).strip()
+    if not refined_query or refined_query.lower() == "none":
+        refined_query = query
+
+    return score, analysis, refined_query, alternatives
+
 
 @dataclass
 class SearchIteration:
@@ -19,6 +185,7 @@ class SearchIteration:
     iteration: int
     refined_query: Optional[str] = None
     analysis: Optional[str] = None
+    alternative_queries: Tuple[str, ...] = ()
 
 
 @dataclass
@@ -43,121 +210,262 @@ class SearchOrchestrator:
         max_iterations: int = 3,
         min_relevance_score: float = 0.7,
         debug: bool = False,
+        max_workers: int = 4,
+        evaluation_cache: Optional[EvaluationCache] = None,
+        auto_accept_distance: Optional[float] = None,
+        auto_reject_distance: Optional[float] = None,
+        beam_width: int = 2,
+        max_evaluations: Optional[int] = None,
     ):
         self.client = client
         self.llm_client = llm_client
         self.collection_name = collection_name
+        if embedding_function is not None and not isinstance(
+            embedding_function, CachingEmbeddingFunction
+        ):
+            embedding_function = CachingEmbeddingFunction(embedding_function)
         self.embedding_function = embedding_function
         self.model = model
         self.max_iterations = max_iterations
         self.min_relevance_score = min_relevance_score
         self.debug = debug
+        self.auto_accept_distance = auto_accept_distance
+        self.auto_reject_distance = auto_reject_distance
+        self.beam_width = max(1, beam_width)
+        # Bound the total number of searched candidates (and LLM calls)
+        self.max_evaluations = (
+            max_evaluations
+            if max_evaluations is not None
+            else max_iterations + self.beam_width
+        )
         self.collection = self.client.get_or_create_collection(
             name=collection_name, embedding_function=embedding_function
         )
+        self.evaluation_cache = (
+            evaluation_cache if evaluation_cache is not None else EvaluationCache()
+        )
+        self.stats = {"hits": 0, "misses": 0}
+        self._query_cache: "OrderedDict[Tuple[str, int], QueryResult]" = OrderedDict()
+        self._query_cache_size = 128
+        self._query_cache_lock = threading.Lock()
+        # Chroma queries and LLM evaluations are network-bound, so candidate
+        # queries of one iteration are fanned out over a small thread pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="rag-search"
+        )
 
     def evaluate_results(
         self, results: QueryResult, query: str, iteration: int
-    ) -> Tuple[float, str, str]:
+    ) -> Evaluation:
         """
         Evaluate search results using LLM to determine relevance and suggest improvements
-        Returns: (relevance_score, analysis, refined_query)
+        Returns: (relevance_score, analysis, refined_query, alternative_queries)
         """
+        # Clear-cut distances don't need an LLM judge. Both thresholds are opt-in:
+        # distances depend on the collection's space (l2 by default) and embedding scale
+        distances = (results.get("distances") or [[]])[0] if results else []
+        if distances:
+            top_distance = min(distances)
+            if (
+                self.auto_accept_distance is not None
+                and top_distance < self.auto_accept_distance
+            ):
+                logger.debug(f"Top distance {top_distance:.3f} below auto-accept")
+                return 1.0, "Auto-accepted by distance threshold", query, ()
+            if (
+                self.auto_reject_distance is not None
+                and top_distance > self.auto_reject_distance
+            ):
+                logger.debug(f"Top distance {top_distance:.3f} above auto-reject")
+                return 0.0, "Auto-rejected by distance threshold", query, ()
+
+        ids = (results.get("ids") or [[]])[0] if results else []
+        cache_key = make_evaluation_key(self.model, query, ids)
+        cached = self.evaluation_cache.get(cache_key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            logger.debug(f"Evaluation cache hit for query: '{query}'")
+            return cached
+        self.stats["misses"] += 1
+
         # Prepare context from results
         context = self._format_results_for_evaluation(results)
 
-        evaluation_prompt = f"""
-        You are an expert search quality analyst. Analyze these search results for the query: "{query}"
-
-        Search iteration: {iteration}
-        Context from search:
-        {context}
-
-        Please provide three things:
-        1. A relevance score between 0.0 and 1.0 (where 1.0 is perfect relevance)
-        2. Brief analysis of why this score was given
-        3. A refined search query that would get better results (or None if current results are optimal)
-
-        Format your response exactly as follows:
-        SCORE: (number between 0.0-1.0)
-        ANALYSIS: (your analysis)
-        REFINED_QUERY: (your suggested query or None)
-        """
+        # Static instructions go first so providers can reuse the cached prefix
+        evaluation_prompt = (
+            f"Query: {query}\nIteration: {iteration}\nContext from search:\n{context}"
+        )
 
         try:
             response = self.llm_client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a search quality analyst. Provide exact format as requested.",
-                    },
+                    {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
                     {"role": "user", "content": evaluation_prompt},
                 ],
+                response_format=EVALUATION_RESPONSE_FORMAT,  # type: ignore[arg-type]
+                stream=True,
             )
 
-            if not response.choices or not response.choices[0].message.content:
+            content = self._read_evaluation_stream(response)
+            if not content:
                 logger.error("No response from LLM during evaluation")
-                return 0.0, "Evaluation failed", query
+                return 0.0, "Evaluation failed", query, ()
 
             # Parse response
-            content = response.choices[0].message.content
-            lines = content.split("\n")
-
-            score = 0.0
-            analysis = "No analysis provided"
-            refined_query = query
-
-            for line in lines:
-                if line.startswith("SCORE:"):
-                    try:
-                        score = float(line.replace("SCORE:", "").strip())
-                    except ValueError:
-                        score = 0.0
-                elif line.startswith("ANALYSIS:"):
-                    analysis = line.replace("ANALYSIS:", "").strip()
-                elif line.startswith("REFINED_QUERY:"):
-                    refined = line.replace("REFINED_QUERY:", "").strip()
-                    if refined.lower() != "none":
-                        refined_query = refined
-
-            return score, analysis, refined_query
+            evaluation = _parse_evaluation(content, query)
+
+            self.evaluation_cache.set(cache_key, evaluation)
+            return evaluation
 
         except Exception as e:
             logger.error(f"Error during result evaluation: {e}")
-            return 0.0, f"Evaluation error: {str(e)}", query
+            return 0.0, f"Evaluation error: {str(e)}", query, ()
+
+    def _read_evaluation_stream(self, response: Any) -> str:
+        """
+        Accumulate a streamed evaluation, closing the stream early once the
+        fields needed to drive the search have arrived
+        """
+        buffer = ""
+        try:
+            for chunk in response:
+                usage = getattr(chunk, "usage", None)
+                details = getattr(usage, "prompt_tokens_details", None)
+                if details is not None and details.cached_tokens:
+                    logger.debug(
+                        f"Evaluation prompt cached tokens: {details.cached_tokens}"
+                    )
+
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                buffer += chunk.choices[0].delta.content
+
+                score_match = _STREAM_SCORE_RE.search(buffer)
+                if score_match is None:
+                    continue
+                # Alternatives only matter when the beam explores them
+                if float(score_match.group(1)) >= self.min_relevance_score or (
+                    _STREAM_REFINED_QUERY_RE.search(buffer) is not None
+                    and (
+                        self.beam_width == 1
+                        or _STREAM_ALTERNATIVES_RE.search(buffer) is not None
+                    )
+                ):
+                    logger.debug("Evaluation fields received, closing stream early")
+                    return _close_partial_json(buffer)
+        finally:
+            response.close()
+
+        return buffer
 
     def _format_results_for_evaluation(self, results: QueryResult) -> str:
         """Format search results into a string for LLM evaluation"""
-        formatted = []
-
-        if not results or not results.get("documents") or not results["documents"]:
+        if not results:
             return "No results found"
 
-        # Safely get documents
-        documents_list = results.get("documents", [[]])
-        documents = (
-            documents_list[0] if documents_list and len(documents_list) > 0 else []
-        )
-
-        # Safely get metadata with multiple fallbacks
-        metadatas_list = results.get("metadatas")
-        if metadatas_list and len(metadatas_list) > 0:
-            metadatas = metadatas_list[0]
-        else:
-            metadatas = []
+        documents = (results.get("documents") or [[]])[0]
+        metadatas = (results.get("metadatas") or [[]])[0]
 
         # Process documents with safe metadata access
-        for i, doc in enumerate(documents):
-            metadata = metadatas[i] if i < len(metadatas) else {}
-            formatted.append(f"Document {i + 1}:")
-            formatted.append(
-                f"Content: {doc[:200]}..." if len(doc) > 200 else f"Content: {doc}"
-            )
-            formatted.append(f"Metadata: {metadata}")
-            formatted.append("---")
+        return "\n".join(
+            f"Document {i + 1}:\n"
+            f"Content: {_truncate_snippet(doc)}\n"
+            f"Metadata: {metadatas[i] if i < len(metadatas) else {}}\n"
+            "---"
+            for i, doc in enumerate(documents)
+        ) or "No results found"
+
+    def _query(self, query: str, n_results: int = 4) -> QueryResult:
+        """Query the collection, memoizing results per (query, n_results)"""
+        key = (query, n_results)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return cached
+
+        results = self.collection.query(query_texts=[query], n_results=n_results)
+
+        with self._query_cache_lock:
+            self._query_cache[key] = results
+            if len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return results
+
+    def _search_and_evaluate(self, query: str, iteration: int) -> SearchIteration:
+        """Run a single Chroma query and evaluate its results"""
+        results = self._query(query)
+        relevance_score, analysis, refined_query, alternatives = self.evaluate_results(
+            results, query, iteration
+        )
+        return SearchIteration(
+            query=query,
+            results=results,
+            relevance_score=relevance_score,
+            iteration=iteration,
+            refined_query=refined_query,
+            analysis=analysis,
+            alternative_queries=alternatives,
+        )
 
-        return "\n".join(formatted)
+    def _search_candidates(
+        self, candidate_queries: List[str], iteration: int
+    ) -> List[SearchIteration]:
+        """
+        Search and evaluate candidate queries concurrently
+        Returns one SearchIteration per candidate, in input order
+        """
+        if len(candidate_queries) == 1:
+            candidates = [self._search_and_evaluate(candidate_queries[0], iteration)]
+        else:
+            futures = [
+                self._executor.submit(self._search_and_evaluate, q, iteration)
+                for q in candidate_queries
+            ]
+            candidates = [f.result() for f in futures]
+
+        for candidate in candidates:
+            results = candidate.results
+            if results and results["documents"] and len(results["documents"]) > 0:
+                logger.info(
+                    f"Results found for '{candidate.query}': {len(results['documents'][0])} documents"
+                )
+                if self.debug:
+                    for i, doc in enumerate(results["documents"][0]):
+                        logger.debug(f"Document {i + 1}: {doc[:100]}...")
+            else:
+                logger.info(f"No results found for '{candidate.query}'")
+
+            logger.info(f"Relevance score: {candidate.relevance_score:.2f}")
+            logger.info(f"Analysis: {candidate.analysis}")
+            logger.info(f"Refined query: '{candidate.refined_query}'")
+
+        return candidates
+
+    @staticmethod
+    def _next_candidates(
+        candidates: List[SearchIteration], searched: set, width: int
+    ) -> List[str]:
+        """
+        Pick up to `width` unsearched refinements for the next beam step,
+        preferring the suggestions of the best scoring candidates
+        """
+        next_queries: List[str] = []
+        if width <= 0:
+            return next_queries
+
+        ranked = sorted(candidates, key=lambda c: c.relevance_score, reverse=True)
+        # Primary refinements first, then the alternatives
+        suggestions = [c.refined_query for c in ranked] + [
+            q for c in ranked for q in c.alternative_queries
+        ]
+        for suggestion in suggestions:
+            if suggestion and suggestion not in searched and suggestion not in next_queries:
+                next_queries.append(suggestion)
+                if len(next_queries) == width:
+                    break
+        return next_queries
 
     def perform_iterative_search(self, query: str) -> SearchResult:
         """
@@ -169,56 +477,35 @@ class SearchOrchestrator:
         best_results = None
         best_score = 0.0
         results = None
+        candidate_queries = [query]
+        searched = set()
 
         logger.info(f"Starting iterative search for query: '{query}'")
         logger.info(
-            f"Max iterations: {self.max_iterations}, Min relevance score: {self.min_relevance_score}"
+            f"Max iterations: {self.max_iterations}, Min relevance score: {self.min_relevance_score}, "
+            f"Beam width: {self.beam_width}"
         )
 
         for iteration in range(self.max_iterations):
             try:
                 logger.info(f"\n=== Iteration {iteration + 1} ===")
-                logger.info(f"Current query: '{current_query}'")
+                logger.info(f"Candidate queries: {candidate_queries}")
 
-                # Perform search
-                results = self.collection.query(
-                    query_texts=[current_query], n_results=4
-                )
+                # Search and evaluate every candidate concurrently
+                searched.update(candidate_queries)
+                candidates = self._search_candidates(candidate_queries, iteration + 1)
+                iterations.extend(candidates)
 
-                # Evaluate results
-                relevance_score, analysis, refined_query = self.evaluate_results(
-                    results, current_query, iteration + 1
-                )
-
-                # Record iteration
-                current_iteration = SearchIteration(
-                    query=current_query,
-                    results=results,
-                    relevance_score=relevance_score,
-                    iteration=iteration + 1,
-                    refined_query=refined_query,
-                    analysis=analysis,
-                )
-                iterations.append(current_iteration)
-
-                if results and results["documents"] and len(results["documents"]) > 0:
-                    logger.info(
-                        f"Results found: {len(results['documents'][0])} documents"
-                    )
-                    if self.debug:
-                        for i, doc in enumerate(results["documents"][0]):
-                            logger.debug(f"Document {i + 1}: {doc[:100]}...")
-                else:
-                    logger.info("No results found")
-
-                logger.info(f"Relevance score: {relevance_score:.2f}")
-                logger.info(f"Analysis: {analysis}")
-                logger.info(f"Refined query: '{refined_query}'")
+                # Continue from the best scoring candidate
+                current_iteration = max(candidates, key=lambda c: c.relevance_score)
+                results = current_iteration.results
+                relevance_score = current_iteration.relevance_score
 
                 # Update best results if better
                 if relevance_score > best_score:
                     best_results = results
                     best_score = relevance_score
+                    current_query = current_iteration.query
 
                 # Check if we should continue
                 if relevance_score >= self.min_relevance_score:
@@ -227,14 +514,19 @@ class SearchOrchestrator:
                     )
                     break
 
-                if current_query == refined_query:
-                    logger.info(
-                        "✓ No further query refinement suggested, stopping iterations"
-                    )
+                remaining = self.max_evaluations - len(iterations)
+                candidate_queries = self._next_candidates(
+                    candidates, searched, min(self.beam_width, remaining)
+                )
+                if not candidate_queries:
+                    if remaining <= 0:
+                        logger.info("✓ Evaluation budget exhausted, stopping iterations")
+                    else:
+                        logger.info(
+                            "✓ No further query refinement suggested, stopping iterations"
+                        )
                     break
 
-                current_query = refined_query
-
             except Exception as e:
                 logger.error(f"❌ Error in search iteration {iteration + 1}: {e}")
                 break
@@ -247,20 +539,10 @@ class SearchOrchestrator:
         if best_results is None and results is None:
             # Perform one final search if no results were obtained
             try:
-                results = self.collection.query(query_texts=[query], n_results=4)
+                results = self._query(query)
             except Exception as e:
                 logger.error(f"Error in final fallback search: {e}")
-                # Create a properly typed empty QueryResult
-                results = cast(
-                    QueryResult,
-                    {
-                        "ids": [[]],
-                        "embeddings": None,
-                        "documents": [[]],
-                        "metadatas": [[]],
-                        "distances": [[]],
-                    },
-                )
+                results = _EMPTY_RESULT
 
         return SearchResult(
             best_results=cast(
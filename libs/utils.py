@@ -1,16 +1,26 @@
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
+from rich.rule import Rule
 from rich.theme import Theme
 import os
+import sys
+import time
+import importlib.util
 import logging
+from functools import lru_cache
 import argparse
-from openai import OpenAI
+from typing import Iterable, List
+import httpx
+from openai import DefaultHttpxClient, OpenAI
 import tiktoken
-import colorlog
 
 logger = logging.getLogger("RAG")
 
+# Keep tiktoken's downloaded BPE files across restarts (instead of the temp dir)
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", os.path.expanduser("~/.cache/rag/tiktoken"))
+
 
 def get_rag_logger(name: str = "RAG") -> logging.Logger:
     """Get a standardized logger for the RAG application"""
@@ -22,24 +32,36 @@ def format_footnotes(metadatas: list[dict]) -> str:
     Deduplicates and formats footnotes from a list of metadata dicts.
     Assumes each metadata contains 'sanitized_title' and 'source' fields.
     """
-    seen = set()
-    numbered = []
+    # Insertion-ordered dict keeps first-seen order while deduplicating
+    seen: dict[tuple[str, str], None] = {}
     for meta in metadatas:
-        title = meta.get("sanitized_title") or meta.get("top_title") or "Untitled"
-        source = meta.get("source", "unknown.md").split("/")[-1]  # Extract filename
-        key = (title, source)
-        if key not in seen:
-            seen.add(key)
-            numbered.append((title.strip(), source.strip()))
+        title = (meta.get("sanitized_title") or meta.get("top_title") or "Untitled").strip()
+        source = meta.get("source", "unknown.md").rsplit("/", 1)[-1].strip()  # Extract filename
+        seen.setdefault((title, source), None)
 
     # Format into footnotes
-    result = "\n".join(
-        [
-            f'[{i + 1}] "{title}", `{source}`'
-            for i, (title, source) in enumerate(numbered)
-        ]
+    return "\n".join(
+        f'[{i + 1}] "{title}", `{source}`' for i, (title, source) in enumerate(seen)
     )
-    return result
+
+
+# Default custom theme for markdown
+_MARKDOWN_THEME = Theme(
+    {
+        "markdown.h1": "bold cyan",
+        "markdown.h2": "bold magenta",
+        "markdown.h3": "bold green",
+        "markdown.code": "bright_white on dark_green",
+        "markdown.block_quote": "italic yellow",
+        "markdown.list_item": "white",
+    }
+)
+
+
+@lru_cache(maxsize=1)
+def _markdown_console() -> Console:
+    """Shared console for markdown output, created on first use"""
+    return Console(theme=_MARKDOWN_THEME, highlight=True)
 
 
 def print_fancy_markdown(
@@ -58,27 +80,13 @@ def print_fancy_markdown(
     Args:
         borders_only: "all" for full borders, "top_bottom" for top/bottom only
     """
-    # Define a default custom theme for markdown
-    custom_theme = Theme(
-        {
-            "markdown.h1": "bold cyan",
-            "markdown.h2": "bold magenta",
-            "markdown.h3": "bold green",
-            "markdown.code": "bright_white on dark_green",
-            "markdown.block_quote": "italic yellow",
-            "markdown.list_item": "white",
-        }
-    )
-
-    console = Console(theme=custom_theme, highlight=True)
+    console = _markdown_console()
 
     md_render = Markdown(md, code_theme=code_theme)
 
     # Create custom border style for top/bottom only
     if borders_only == "top_bottom":
         # Use simple horizontal separators instead of full panel borders
-        from rich.rule import Rule
-
         console.print(Rule(title, style=border_style))
         console.print(md_render)
         console.print(Rule(style=border_style))
@@ -89,27 +97,102 @@ def print_fancy_markdown(
         )
 
 
+# Live markdown is re-parsed at most this many times per second while streaming
+STREAM_REFRESH_PER_SECOND = 12
+
+
+def print_fancy_markdown_stream(
+    chunks: Iterable[str],
+    title: str,
+    border_style: str = "green",
+    code_theme: str = "monokai",
+) -> str:
+    """
+    Render streamed markdown between top/bottom rules as it arrives.
+
+    Returns:
+        The full text once the stream is exhausted.
+    """
+    console = _markdown_console()
+    if not console.is_terminal:
+        # Nothing to animate when piped; print once like print_fancy_markdown
+        text = "".join(chunks)
+        print_fancy_markdown(text, title, border_style, code_theme, borders_only="top_bottom")
+        return text
+
+    parts: List[str] = []
+    interval = 1 / STREAM_REFRESH_PER_SECOND
+    last_update = 0.0
+
+    console.print(Rule(title, style=border_style))
+    # The live preview is cropped to the screen and erased on exit; output taller than the
+    # terminal would otherwise be repeated in scrollback on every refresh
+    with Live(
+        Markdown("", code_theme=code_theme),
+        console=console,
+        refresh_per_second=STREAM_REFRESH_PER_SECOND,
+        vertical_overflow="ellipsis",
+        transient=True,
+    ) as live:
+        for chunk in chunks:
+            parts.append(chunk)
+            # Markdown is parsed on construction, so rebuild it at the refresh rate, not per chunk
+            now = time.monotonic()
+            if now - last_update >= interval:
+                live.update(Markdown("".join(parts), code_theme=code_theme))
+                last_update = now
+    console.print(Markdown("".join(parts), code_theme=code_theme))
+    console.print(Rule(style=border_style))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=1)
+def get_shared_http_client() -> httpx.Client:
+    """HTTP client shared by all LLM clients so connections are kept alive and reused.
+
+    HTTP/2 is enabled when the optional h2 package is installed (HTTPS endpoints only).
+    """
+    return DefaultHttpxClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=32, keepalive_expiry=60),
+    )
+
+
 def create_openai_client(args: argparse.Namespace) -> OpenAI:
-    """Creates an OpenAI-compatible client based on the LLM provider."""
-    if args.provider == "ollama":
+    """Creates an OpenAI-compatible client based on the LLM provider.
+
+    Clients are shared per provider and endpoint across the process.
+    """
+    if args.llm == "ollama":
+        return _get_openai_client(args.llm, args.ollama_host, args.ollama_port)
+    return _get_openai_client(args.llm)
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(provider: str, ollama_host: str = "", ollama_port: int = 0) -> OpenAI:
+    http_client = get_shared_http_client()
+    if provider == "ollama":
         logger.debug("Using Ollama as LLM")
         return OpenAI(
-            base_url=f"http://{args.ollama_host}:{args.ollama_port}/v1",
+            base_url=f"http://{ollama_host}:{ollama_port}/v1",
             api_key="ollama",  # required, but unused
+            http_client=http_client,
         )
-    elif args.provider == "gemini":
+    elif provider == "gemini":
         logger.debug("Using Gemini as LLM")
         return OpenAI(
             api_key=os.getenv("GEMINI_API_KEY"),
             base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+            http_client=http_client,
         )
     else:
         logger.debug("Using OpenAI as LLM")
-        return OpenAI()
+        return OpenAI(http_client=http_client)
 
 
+@lru_cache(maxsize=None)
 def get_tokenizer_for_model(model_name: str):
-    """Get appropriate tokenizer for the model."""
+    """Get appropriate tokenizer for the model (cached per model name)."""
     try:
         if model_name.startswith("gpt-"):
             return tiktoken.encoding_for_model(model_name)
@@ -122,6 +205,78 @@ def get_tokenizer_for_model(model_name: str):
         return tiktoken.encoding_for_model("gpt-4")
 
 
+# Hugging Face counterpart of tiktoken's cl100k_base vocabulary
+HF_TOKENIZER_NAME = "Xenova/gpt-4"
+
+
+class ApproxTokenCounter:
+    """Estimates tokens from text length (1 token ≈ 4 characters) without loading a tokenizer"""
+
+    # Whether counts are estimates rather than tokenizer output
+    approx = True
+
+    def count(self, text: str) -> int:
+        # Short replies like "ok" would otherwise round down to zero tokens
+        return max(1, len(text) // 4) if text else 0
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+
+class TokenCounter(ApproxTokenCounter):
+    """Counts tokens with the tiktoken encoding for a model"""
+
+    approx = False
+
+    def __init__(self, model_name: str):
+        super().__init__()
+        self.encoding = get_tokenizer_for_model(model_name)
+
+    def count(self, text: str) -> int:
+        # encode_ordinary skips the special-token scan encode() does
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
+
+
+class HFTokenCounter(ApproxTokenCounter):
+    """Counts tokens with the Rust `tokenizers` library, which releases the GIL"""
+
+    approx = False
+
+    def __init__(self, name: str = HF_TOKENIZER_NAME):
+        super().__init__()
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_pretrained(name)
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model_name: str, backend: str = "tiktoken") -> ApproxTokenCounter:
+    """Get a token counter for the model (cached per model name and backend)."""
+    if backend == "approx":
+        return ApproxTokenCounter()
+    if backend == "hf":
+        try:
+            return HFTokenCounter()
+        except Exception as e:
+            logger.warning(f"Could not load tokenizers backend ({e}). Falling back to tiktoken.")
+    try:
+        counter = TokenCounter(model_name)
+        counter.count("")
+        return counter
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding ({e}). Estimating tokens from text length.")
+    return ApproxTokenCounter()
+
+
 def validate_client_and_exit(client, action: str, logger: logging.Logger) -> bool:
     """Validate ChromaDB client and exit with error if None
 
@@ -139,6 +294,34 @@ def validate_client_and_exit(client, action: str, logger: logging.Logger) -> boo
     return True
 
 
+_COLORED_HANDLER_NAME = "rag-colored"
+
+# Chatty HTTP and library loggers, kept at WARNING
+_NOISY_LOGGERS = ("httpx", "urllib3", "chromadb", "openai", "httpcore", "boto3", "botocore")
+
+
+class AnsiFormatter(logging.Formatter):
+    """Prefix records with an ANSI color for their level, plain text when stderr is not a terminal"""
+
+    LEVEL_COLORS = {
+        logging.DEBUG: "\x1b[36m",  # cyan
+        logging.INFO: "\x1b[32m",  # green
+        logging.WARNING: "\x1b[33m",  # yellow
+        logging.ERROR: "\x1b[31m",  # red
+        logging.CRITICAL: "\x1b[31;47m",  # red on white
+    }
+    RESET = "\x1b[0m"
+
+    def __init__(self, fmt: str, use_color: bool = True) -> None:
+        super().__init__(fmt)
+        self.use_color = use_color
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        color = self.LEVEL_COLORS.get(record.levelno) if self.use_color else None
+        return f"{color}{message}{self.RESET}" if color else message
+
+
 def setup_colored_logging(log_level) -> None:
     """Set up colored logging for the RAG application
 
@@ -146,32 +329,24 @@ def setup_colored_logging(log_level) -> None:
         log_level: Logging level to use
     """
 
-    # Set up colored logging
-    handler = colorlog.StreamHandler()
-    handler.setFormatter(
-        colorlog.ColoredFormatter(
-            "%(log_color)s%(levelname)s:%(name)s:%(message)s",
-            log_colors={
-                "DEBUG": "cyan",
-                "INFO": "green",
-                "WARNING": "yellow",
-                "ERROR": "red",
-                "CRITICAL": "red,bg_white",
-            },
-        )
-    )
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
     root_logger.setLevel(log_level)
 
-    # Suppress noisy HTTP and library logs
-    for noisy_logger in [
-        "httpx",
-        "urllib3",
-        "chromadb",
-        "openai",
-        "httpcore",
-        "boto3",
-        "botocore",
-    ]:
+    # Set up colored logging once; calling this again (e.g. main() run in-process
+    # more than once) must not stack handlers and print every line twice
+    if not any(h.get_name() == _COLORED_HANDLER_NAME for h in root_logger.handlers):
+        handler = logging.StreamHandler()
+        handler.set_name(_COLORED_HANDLER_NAME)
+        handler.setFormatter(
+            AnsiFormatter("%(levelname)s:%(name)s:%(message)s", use_color=sys.stderr.isatty())
+        )
+        root_logger.addHandler(handler)
+
+    _configure_noisy_loggers()
+
+
+@lru_cache(maxsize=1)
+def _configure_noisy_loggers() -> None:
+    """Suppress noisy HTTP and library logs, once per process"""
+    for noisy_logger in _NOISY_LOGGERS:
         logging.getLogger(noisy_logger).setLevel(logging.WARNING)
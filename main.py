@@ -1,45 +1,74 @@
-import chromadb
 import logging
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 from libs.args import parse_arguments
-from libs.commands.data_fill.data import process_data_fill
-from libs.commands.search.search import process_search
-from libs.commands.chat.chat import process_chat
-from libs.commands.web.web import process_web
-from libs.list_models import process_list_models
-from libs.cache import pre_cache_llm_models, CacheRequirements
-from chromadb.config import Settings
-from libs.utils import setup_colored_logging, validate_client_and_exit
+
+# Heavy modules are imported in main() once the subcommand is known, so
+# --help, argument errors and list-models don't pay for ChromaDB and the
+# other subcommands' dependencies
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
 
 logger = logging.getLogger("RAG")
 
 
+@lru_cache(maxsize=4)
+def get_chroma_client(path: str, host: str, port: int) -> "ClientAPI":
+    """ChromaDB client for a path or server, reused when main() runs more than once in a process
+
+    Uses a persistent client if a path is given, otherwise an HTTP client.
+    """
+    import chromadb
+    from chromadb.config import Settings
+
+    chroma_settings = Settings(anonymized_telemetry=False)
+    if len(path) > 0:
+        return chromadb.PersistentClient(path=path, settings=chroma_settings)
+    # https://docs.trychroma.com/reference/python/client
+    return chromadb.HttpClient(host=host, port=port, settings=chroma_settings)
+
+
 def main():
     # Parse command line arguments
     args = parse_arguments()
 
+    # Green-thread modes have to monkey-patch the stdlib before the libs below
+    # import httpx, chromadb and friends, or those keep unpatched locks and sockets
+    if args.subparser == "web":
+        from libs.commands.web.async_mode import prepare_async_mode
+        args.async_mode = prepare_async_mode(args.async_mode, args.debug)
+
     # Determine if Chroma should be used for data-fill
     insert_into_chroma = True
     if getattr(args, "subparser", None) == "data-fill":
         insert_into_chroma = getattr(args, "insert_into_chroma", True)
 
-    # Set up colored logging
-    setup_colored_logging(args.log_level)
+    from libs.utils import setup_colored_logging, validate_client_and_exit
+    from libs.list_models import process_list_models
 
-    # Handle list-models command (doesn't need ChromaDB client)
+    # Handle list-models command (doesn't need ChromaDB client). Its output is a
+    # table printed to the console, so logging is only set up when debugging it;
+    # warnings still reach stderr through logging's last resort handler
     if args.subparser == "list-models":
+        if args.log_level == "DEBUG":
+            setup_colored_logging(args.log_level)
         process_list_models(args=args, force_refresh=True)
         return
 
+    # Set up colored logging
+    setup_colored_logging(args.log_level)
+
     # Pre-cache models that will be needed based on the LLM provider being used
     llm_provider = getattr(args, 'llm', 'ollama')  # Default to ollama if not specified
     embedding_llm_provider = getattr(args, 'embedding_llm', 'ollama')  # Default to ollama if not specified
 
     # Only pre-cache models and set up ChromaDB client if not skipping Chroma for data-fill
-    chroma_settings = Settings(anonymized_telemetry=False)
     client = None
 
     if args.subparser != "data-fill" or insert_into_chroma:
+        from libs.cache import pre_cache_llm_models, CacheRequirements
+
         # Set up caching requirements
         cache_requirements = CacheRequirements(
             llm_provider=llm_provider,
@@ -47,33 +76,36 @@ def main():
             subcommand=args.subparser
         )
 
-        # Pre-cache models
-        pre_cache_llm_models(
-            requirements=cache_requirements,
-            process_list_models=process_list_models,
-            args=args,
-        )
-
-        # Initialize ChromaDB client - use persistent client if path provided, otherwise HTTP client
-        if len(args.chromadb_path) > 0:
-            client = chromadb.PersistentClient(
-                path=args.chromadb_path, settings=chroma_settings
-            )
-        else:
-            # https://docs.trychroma.com/reference/python/client
-            client = chromadb.HttpClient(
-                host=args.chromadb_host, port=args.chromadb_port, settings=chroma_settings
+        # Long-running commands warm the model list before serving; one-shot
+        # search and chat list models when resolving theirs anyway, so skip it
+        if args.subparser in ("web", "data-fill"):
+            pre_cache_llm_models(
+                requirements=cache_requirements,
+                process_list_models=process_list_models,
+                args=args,
             )
 
+        # Initialize ChromaDB client - use persistent client if path provided, otherwise HTTP client.
+        # data-fill opens it itself once it has documents to insert
+        if args.subparser != "data-fill":
+            client = get_chroma_client(args.chromadb_path, args.chromadb_host, args.chromadb_port)
+
     # Route to appropriate command handler based on subparser
     if args.subparser == "data-fill":
-        process_data_fill(client=client, args=args)
+        from libs.commands.data_fill.data import process_data_fill
+        client_factory = (
+            partial(get_chroma_client, args.chromadb_path, args.chromadb_host, args.chromadb_port)
+            if insert_into_chroma
+            else None
+        )
+        process_data_fill(client_factory=client_factory, args=args)
 
     elif args.subparser == "search":
         # Validate that we have a ChromaDB client before proceeding
         if not validate_client_and_exit(client, "perform search", logger):
             return
         assert client is not None  # Type hint for pyright
+        from libs.commands.search.search import process_search
         process_search(client=client, args=args)
 
     elif args.subparser == "chat":
@@ -81,6 +113,7 @@ def main():
         if not validate_client_and_exit(client, "start chat", logger):
             return
         assert client is not None  # Type hint for pyright
+        from libs.commands.chat.chat import process_chat
         process_chat(client=client, args=args)
 
     elif args.subparser == "web":
@@ -88,6 +121,7 @@ def main():
         if not validate_client_and_exit(client, "start web interface", logger):
             return
         assert client is not None  # Type hint for pyright
+        from libs.commands.web.web import process_web
         process_web(client=client, args=args)
 
 
@@ -0,0 +1,15 @@
+"""Shared test setup."""
+
+import os
+import sys
+import tempfile
+
+# Keep tiktoken's downloaded encodings from the real home directory
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", os.path.expanduser("~/.cache/rag/tiktoken"))
+
+# Embedding, answer and model list caches default to paths under the home
+# directory, resolved at import time, so point it at a scratch directory
+# before any libs module is imported
+os.environ["HOME"] = tempfile.mkdtemp(prefix="rag-tests-home-")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
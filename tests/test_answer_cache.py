@@ -0,0 +1,37 @@
+"""Unit tests for the semantic answer cache."""
+
+import pytest
+
+from libs.cache import AnswerCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnswerCache(db_path=tmp_path / "answers.sqlite", similarity_threshold=0.97)
+    cache.put("docs", "model", "what is rag", [1.0, 0.0, 0.0], "Retrieval augmented generation")
+    return cache
+
+
+def test_returns_answer_above_threshold(cache):
+    # Scale does not matter, only the direction of the embedding
+    assert cache.get("docs", "model", [10.0, 1.0, 0.0]) == "Retrieval augmented generation"
+
+
+def test_misses_below_threshold(cache):
+    assert cache.get("docs", "model", [1.0, 0.5, 0.0]) is None
+
+
+def test_answers_are_scoped_to_collection_and_model(cache):
+    assert cache.get("other", "model", [1.0, 0.0, 0.0]) is None
+    assert cache.get("docs", "other", [1.0, 0.0, 0.0]) is None
+
+
+def test_ignores_embeddings_of_another_size(cache):
+    assert cache.get("docs", "model", [1.0, 0.0]) is None
+
+
+def test_expired_answers_are_not_returned(tmp_path):
+    cache = AnswerCache(db_path=tmp_path / "answers.sqlite", ttl=-1)
+    cache.put("docs", "model", "what is rag", [1.0, 0.0, 0.0], "stale")
+
+    assert cache.get("docs", "model", [1.0, 0.0, 0.0]) is None
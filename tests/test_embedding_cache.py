@@ -0,0 +1,53 @@
+"""Unit tests for the embedding cache's float16 disk storage."""
+
+import sqlite3
+
+import numpy as np
+
+from libs.cache import CachingEmbeddingFunction
+
+
+class FakeEmbedding:
+    """Embeds texts from a fixed table and counts the texts it was asked for"""
+
+    def __init__(self, vectors) -> None:
+        self.vectors = vectors
+        self.embedded = 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        return [np.asarray(self.vectors[text], dtype=np.float32) for text in input]
+
+    def get_config(self):
+        return {"model_name": "fake"}
+
+
+def stored_dtypes(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return sorted(row[0] for row in conn.execute("SELECT dtype FROM embeddings"))
+
+
+def test_float16_round_trip(tmp_path):
+    db_path = tmp_path / "embeddings.db"
+    vector = np.linspace(-1, 1, 8, dtype=np.float32)
+    CachingEmbeddingFunction(FakeEmbedding({"text": vector}), db_path=db_path)(["text"])
+
+    # A fresh wrapper has an empty memory tier, so the vector comes from disk
+    inner = FakeEmbedding({})
+    [embedding] = CachingEmbeddingFunction(inner, db_path=db_path)(["text"])
+
+    assert inner.embedded == 0
+    assert stored_dtypes(db_path) == ["float16"]
+    assert embedding.dtype == np.float32
+    np.testing.assert_allclose(embedding, vector, atol=1e-3)
+
+
+def test_out_of_range_vectors_stay_float32(tmp_path):
+    db_path = tmp_path / "embeddings.db"
+    vector = np.array([1e6, -2.5], dtype=np.float32)
+    CachingEmbeddingFunction(FakeEmbedding({"big": vector}), db_path=db_path)(["big"])
+
+    [embedding] = CachingEmbeddingFunction(FakeEmbedding({}), db_path=db_path)(["big"])
+
+    assert stored_dtypes(db_path) == ["float32"]
+    np.testing.assert_array_equal(embedding, vector)
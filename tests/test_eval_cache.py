@@ -0,0 +1,55 @@
+"""Unit tests for the search evaluation cache."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from libs.cache import EvaluationCache, make_evaluation_key
+from libs.cache import eval_cache
+
+EVALUATION = (0.8, "Relevant", "refined query", ("alternative",))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(eval_cache.time, "time", lambda: now.value)
+    return now
+
+
+def test_key_depends_on_model_query_and_result_order():
+    key = make_evaluation_key("model", "query", ["a", "b"])
+
+    assert key == make_evaluation_key("model", "query", ["a", "b"])
+    assert key != make_evaluation_key("other", "query", ["a", "b"])
+    assert key != make_evaluation_key("model", "query", ["b", "a"])
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = EvaluationCache(db_path=None, ttl=60)
+    cache.set("key", EVALUATION)
+
+    clock.value += 59
+    assert cache.get("key") == EVALUATION
+    clock.value += 2
+    assert cache.get("key") is None
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = EvaluationCache(db_path=None, max_entries=2)
+    cache.set("a", EVALUATION)
+    cache.set("b", EVALUATION)
+    cache.get("a")
+    cache.set("c", EVALUATION)
+
+    assert cache.get("a") == EVALUATION
+    assert cache.get("b") is None
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path, clock):
+    db_path = tmp_path / "evaluations.sqlite"
+    EvaluationCache(db_path=db_path, ttl=60).set("key", EVALUATION)
+
+    assert EvaluationCache(db_path=db_path).get("key") == EVALUATION
+    clock.value += 61
+    assert EvaluationCache(db_path=db_path).get("key") is None
@@ -0,0 +1,104 @@
+"""Unit tests for the two-tier QueryCache."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from libs.cache import QueryCache, bump_collection_generation
+from libs.cache import query_cache
+from libs.cache.query_cache import GENERATION_METADATA_KEY, collection_state
+
+
+class FakeCollection:
+    """Counts queries and stores metadata the way Collection.modify does"""
+
+    def __init__(self, collection_id: str = "c1") -> None:
+        self.id = collection_id
+        self.name = "test"
+        self.metadata = None
+        self.queries = 0
+
+    def query(self, **kwargs):
+        self.queries += 1
+        return {"documents": [[f"result {self.queries}"]], "metadatas": [[{}]]}
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+def embed(texts):
+    """Embed texts as their letter counts, so anagrams land on the same vector"""
+    return [np.bincount([ord(c) - 97 for c in text if c.isalpha()], minlength=26).astype(np.float32) for text in texts]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now.value)
+    return now
+
+
+def test_exact_hit_ignores_case_and_whitespace():
+    cache = QueryCache()
+    cache.put("What is RAG?", None, "results")
+
+    assert cache.get("  what is   rag? ") == "results"
+    assert cache.get("what is a rag?") is None
+
+
+def test_similar_embeddings_hit_despite_int8_quantization():
+    cache = QueryCache(similarity_threshold=0.97)
+    rng = np.random.default_rng(0)
+    embedding = rng.normal(size=384).astype(np.float32)
+    cache.put("first", embedding, "results")
+
+    assert cache.get_similar(embedding * 3 + rng.normal(scale=0.01, size=384)) == "results"
+    assert cache.get_similar(rng.normal(size=384)) is None
+    assert cache.get_similar(np.ones(8)) is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = QueryCache(ttl=300)
+    embedding = np.ones(4)
+    cache.put("question", embedding, "results")
+
+    clock.value += 299
+    assert cache.get("question") == "results"
+    assert cache.get_similar(embedding) == "results"
+
+    clock.value += 1
+    assert cache.get("question") is None
+    assert cache.get_similar(embedding) is None
+
+
+def test_sync_clears_only_on_state_change():
+    cache = QueryCache()
+    cache.sync(("c1", None))
+    cache.put("question", np.ones(4), "results")
+
+    cache.sync(("c1", None))
+    assert cache.get("question") == "results"
+
+    cache.sync(("c1", "generation-2"))
+    assert cache.get("question") is None
+    assert cache.get_similar(np.ones(4)) is None
+
+
+def test_query_reuses_results_until_the_collection_generation_changes():
+    cache = QueryCache()
+    collection = FakeCollection()
+
+    first = cache.query(collection, embed, "listen")
+    assert cache.query(collection, embed, "LISTEN") is first
+    assert cache.query(collection, embed, "silent") is first
+    assert collection.queries == 1
+
+    bump_collection_generation(collection)
+    assert collection.metadata[GENERATION_METADATA_KEY]
+    assert cache.query(collection, embed, "listen") is not first
+    assert collection.queries == 2
+
+
+def test_collection_state_changes_when_the_collection_is_recreated():
+    assert collection_state(FakeCollection("c1")) != collection_state(FakeCollection("c2"))
@@ -0,0 +1,205 @@
+"""Unit tests for the SearchOrchestrator helpers."""
+
+import json
+from types import SimpleNamespace
+from typing import List, cast
+
+import pytest
+from chromadb.api.types import QueryResult
+
+from libs import search_orchestrator
+from libs.cache import EvaluationCache
+from libs.search_orchestrator import (
+    SNIPPET_TOKENS,
+    SearchIteration,
+    SearchOrchestrator,
+    _parse_evaluation,
+    _truncate_snippet,
+)
+
+EVALUATION = json.dumps(
+    {"score": 0.4, "refined_query": "better query", "alternative_queries": [], "analysis": "Partial"}
+)
+
+
+@pytest.fixture
+def encoder():
+    encoder = search_orchestrator._snippet_encoder()
+    if encoder is None:
+        pytest.skip("cl100k_base encoding is not available")
+    return encoder
+
+
+def test_truncate_snippet_keeps_short_text(encoder):
+    assert _truncate_snippet("short text") == "short text"
+
+
+def test_truncate_snippet_cuts_at_token_budget(encoder):
+    snippet = _truncate_snippet("word " * 500)
+
+    assert snippet.endswith("...")
+    assert len(encoder.encode_ordinary(snippet[:-3])) == SNIPPET_TOKENS
+
+
+def test_truncate_snippet_falls_back_to_characters(monkeypatch):
+    monkeypatch.setattr(search_orchestrator, "_snippet_encoder", lambda: None)
+
+    assert _truncate_snippet("x" * 300) == "x" * 200 + "..."
+    assert _truncate_snippet("x" * 200) == "x" * 200
+
+
+class FakeCompletions:
+    """Records calls and answers every evaluation with the same JSON"""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        delta = SimpleNamespace(content=self.content)
+        chunk = SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        return FakeStream([chunk])
+
+
+class FakeStream:
+    def __init__(self, chunks) -> None:
+        self._chunks = chunks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def close(self) -> None:
+        pass
+
+
+def make_orchestrator(content: str = EVALUATION, **kwargs) -> SearchOrchestrator:
+    client = SimpleNamespace(get_or_create_collection=lambda **_: SimpleNamespace())
+    llm_client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(content)))
+    return SearchOrchestrator(
+        client=client,  # type: ignore[arg-type]
+        llm_client=llm_client,  # type: ignore[arg-type]
+        collection_name="test",
+        embedding_function=None,
+        model="fake",
+        evaluation_cache=EvaluationCache(db_path=None),
+        **kwargs,
+    )
+
+
+def make_results(distances: List[float]) -> QueryResult:
+    return cast(QueryResult, {
+        "ids": [[f"id{i}" for i in range(len(distances))]],
+        "documents": [[f"document {i}" for i in range(len(distances))]],
+        "metadatas": [[{} for _ in distances]],
+        "distances": [distances],
+    })
+
+
+def test_distance_thresholds_are_off_by_default():
+    orchestrator = make_orchestrator()
+
+    score, _, _, _ = orchestrator.evaluate_results(make_results([0.01]), "query", 1)
+
+    assert score == 0.4
+    assert orchestrator.llm_client.chat.completions.calls == 1
+
+
+def test_auto_accept_distance_skips_the_judge():
+    orchestrator = make_orchestrator(auto_accept_distance=0.15)
+
+    score, analysis, _, _ = orchestrator.evaluate_results(make_results([0.01, 0.5]), "query", 1)
+
+    assert (score, analysis) == (1.0, "Auto-accepted by distance threshold")
+    assert orchestrator.llm_client.chat.completions.calls == 0
+
+
+def test_auto_reject_distance_skips_the_judge():
+    orchestrator = make_orchestrator(auto_reject_distance=1.0)
+
+    score, _, refined_query, _ = orchestrator.evaluate_results(make_results([1.5]), "query", 1)
+
+    assert (score, refined_query) == (0.0, "query")
+    assert orchestrator.llm_client.chat.completions.calls == 0
+
+
+def test_parse_evaluation_reads_json():
+    content = json.dumps({
+        "score": 0.8,
+        "analysis": "Relevant",
+        "refined_query": " tighter query ",
+        "alternative_queries": [" other query ", 3],
+    })
+
+    assert _parse_evaluation(content, "query") == (0.8, "Relevant", "tighter query", ("other query",))
+
+
+def test_parse_evaluation_falls_back_to_lines():
+    content = "SCORE: 0.6\nANALYSIS: Mostly relevant\nREFINED_QUERY: none"
+
+    assert _parse_evaluation(content, "query") == (0.6, "Mostly relevant", "query", ())
+
+
+def test_parse_evaluation_defaults_on_garbage():
+    assert _parse_evaluation('{"score": "high"}', "query") == (0.0, "No analysis provided", "query", ())
+
+
+def test_close_partial_json_keeps_received_fields():
+    buffer = '{"score": 0.7, "refined_query": "next query", "analysis": "Covers the topic but'
+
+    assert json.loads(search_orchestrator._close_partial_json(buffer)) == {
+        "score": 0.7,
+        "refined_query": "next query",
+        "alternative_queries": [],
+        "analysis": "Covers the topic but",
+    }
+
+
+def test_close_partial_json_drops_a_dangling_escape():
+    buffer = '{"score": 0.5, "analysis": "Quotes \\"partly\\'
+
+    closed = json.loads(search_orchestrator._close_partial_json(buffer))
+
+    assert closed["analysis"] == 'Quotes "partly'
+    assert closed["refined_query"] is None
+
+
+def test_close_partial_json_without_analysis():
+    closed = json.loads(search_orchestrator._close_partial_json('{"score": 0.9, '))
+
+    assert closed["score"] == 0.9
+    assert closed["analysis"] == "Analysis skipped, evaluation stream closed early"
+
+
+def make_iteration(score: float, refined_query: str, *alternatives: str) -> SearchIteration:
+    return SearchIteration(
+        query="query",
+        results=make_results([0.5]),
+        relevance_score=score,
+        iteration=1,
+        refined_query=refined_query,
+        alternative_queries=alternatives,
+    )
+
+
+def test_next_candidates_prefers_best_scoring_refinements():
+    candidates = [
+        make_iteration(0.3, "weak refinement", "weak alternative"),
+        make_iteration(0.6, "strong refinement", "strong alternative"),
+    ]
+
+    assert SearchOrchestrator._next_candidates(candidates, set(), 3) == [
+        "strong refinement",
+        "weak refinement",
+        "strong alternative",
+    ]
+
+
+def test_next_candidates_skips_searched_and_duplicate_queries():
+    candidates = [
+        make_iteration(0.6, "query", "fresh query", "fresh query"),
+        make_iteration(0.3, "", "other query"),
+    ]
+
+    assert SearchOrchestrator._next_candidates(candidates, {"query"}, 5) == ["fresh query", "other query"]
+    assert SearchOrchestrator._next_candidates(candidates, set(), 0) == []
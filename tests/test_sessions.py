@@ -0,0 +1,42 @@
+"""Unit tests for the in-process web session store."""
+
+import threading
+from collections import deque
+
+from libs.commands.web.sessions import SessionStore
+
+
+def new_state():
+    return {"current_chat_id": None, "conversation_history": deque(), "token_totals": {"user": 0, "assistant": 0}}
+
+
+def test_update_creates_missing_state():
+    store = SessionStore()
+
+    state = store.update("sid", lambda s: s.update(current_chat_id="chat"), new_state)
+
+    assert state["current_chat_id"] == "chat"
+    assert store.get("sid") is state
+
+
+def test_concurrent_updates_keep_every_change():
+    store = SessionStore()
+
+    def append(i):
+        store.update("sid", lambda s: s["conversation_history"].append(i), new_state)
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(store.get("sid")["conversation_history"]) == list(range(50))
+
+
+def test_sweep_drops_idle_sessions():
+    store = SessionStore()
+    store.set("sid", new_state())
+
+    assert store.sweep(ttl=-1) == 1
+    assert store.get("sid") is None
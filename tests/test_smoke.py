@@ -0,0 +1,199 @@
+"""Smoke tests running each subcommand through main() against a temporary ChromaDB.
+
+Model providers are replaced with in-process fakes, so no Ollama server or
+API keys are needed.
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+import main
+from libs.models import ModelManager
+
+QUERY = "What do smoke tests exercise?"
+ANSWER = "Smoke tests exercise every subcommand [1]."
+EVALUATION = json.dumps(
+    {"score": 1.0, "refined_query": None, "alternative_queries": [], "analysis": "Relevant"}
+)
+DOCUMENT = """# Smoke testing
+
+Smoke tests exercise every subcommand end to end.
+
+## Scope
+
+They check wiring rather than answer quality.
+"""
+
+
+class FakeEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic embeddings derived from a hash of the text"""
+
+    def __init__(self) -> None:
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [
+            np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8).astype(np.float32)
+            for text in input
+        ]
+
+    @staticmethod
+    def name() -> str:
+        return "smoke-test"
+
+    def get_config(self) -> dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "FakeEmbeddingFunction":
+        return FakeEmbeddingFunction()
+
+
+class FakeStream:
+    """Iterable of completion chunks with the close() of an OpenAI stream"""
+
+    def __init__(self, content: str) -> None:
+        self._chunks = iter([
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+        ])
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self) -> None:
+        pass
+
+
+class FakeCompletions:
+    """Answers search evaluations with a perfect score and everything else with ANSWER"""
+
+    def create(self, messages, stream=False, **kwargs):
+        content = EVALUATION if kwargs.get("response_format") else ANSWER
+        if stream:
+            return FakeStream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    fake_llm = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(
+        ModelManager, "list_models", lambda self, provider: [{"id": "fake", "name": "fake", "provider": provider}]
+    )
+    monkeypatch.setattr(
+        ModelManager, "get_validated_model", lambda self, provider, model_name, model_type: model_name or "fake"
+    )
+    monkeypatch.setattr(
+        "libs.commands.data_fill.embedding._create_embedding_function", lambda *args: FakeEmbeddingFunction()
+    )
+    monkeypatch.setattr("libs.utils._get_openai_client", lambda *args: fake_llm)
+    monkeypatch.setattr(
+        "libs.commands.data_fill.utils.extract_keywords_with_keybert", lambda text, top_n=5: ["smoke", "testing"]
+    )
+
+
+@pytest.fixture
+def common_args(tmp_path):
+    return [
+        "--chromadb-path", str(tmp_path / "chroma"),
+        "--chat-db-path", str(tmp_path / "chats.db"),
+        "--collection", "smoke",
+        "--llm", "ollama",
+        "--embedding-llm", "ollama",
+        "--log-level", "WARNING",
+    ]
+
+
+def run_main(monkeypatch, *argv: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    main.main()
+
+
+def get_collection(tmp_path):
+    client = main.get_chroma_client(str(tmp_path / "chroma"), "127.0.0.1", 8000)
+    return client.get_collection("smoke", embedding_function=FakeEmbeddingFunction())
+
+
+@pytest.fixture
+def filled(monkeypatch, tmp_path, fake_providers, common_args):
+    source = tmp_path / "smoke.md"
+    source.write_text(DOCUMENT)
+    run_main(monkeypatch, "data-fill", str(source), *common_args)
+
+
+@pytest.mark.parametrize("mode", ["single", "elements"])
+def test_data_fill(monkeypatch, tmp_path, fake_providers, common_args, mode):
+    source = tmp_path / "smoke.md"
+    source.write_text(DOCUMENT)
+
+    run_main(monkeypatch, "data-fill", str(source), "--mode", mode, "--cleanup", *common_args)
+
+    assert get_collection(tmp_path).count() > 0
+
+
+def test_list_models(monkeypatch, capsys, fake_providers):
+    run_main(monkeypatch, "list-models", "ollama")
+
+    assert "fake" in capsys.readouterr().out
+
+
+def test_search(monkeypatch, capsys, filled, common_args):
+    run_main(monkeypatch, "search", QUERY, *common_args)
+
+    assert ANSWER in capsys.readouterr().out
+
+
+def test_search_answer_cache(monkeypatch, capsys, filled, common_args):
+    run_main(monkeypatch, "search", QUERY, *common_args)
+    run_main(monkeypatch, "search", QUERY, "--cache", *common_args)
+    run_main(monkeypatch, "search", QUERY, "--cache", *common_args)
+
+    replies = capsys.readouterr().out
+    assert replies.count(ANSWER) == 3
+    assert replies.count("(cached)") == 1
+
+
+def test_chat(monkeypatch, filled, common_args):
+    from libs.commands.chat.chat import ChatApp
+
+    mounted = []
+
+    def run_headless(self):
+        async def drive():
+            async with self.run_test() as pilot:
+                await pilot.pause()
+                mounted.append(self.embedding_function is not None)
+
+        asyncio.run(drive())
+
+    monkeypatch.setattr(ChatApp, "run", run_headless)
+
+    run_main(monkeypatch, "chat", *common_args)
+
+    assert mounted == [True]
+
+
+def test_web(monkeypatch, tmp_path, filled, common_args):
+    import flask_socketio
+
+    (tmp_path / "build" / "static").mkdir(parents=True)
+    monkeypatch.setattr("libs.commands.web.web.WEB_BUILD_PATH", str(tmp_path / "build"))
+    served = []
+    monkeypatch.setattr(flask_socketio.SocketIO, "run", lambda self, app, **kwargs: served.append(app))
+
+    run_main(monkeypatch, "web", "--async-mode", "threading", *common_args)
+
+    assert len(served) == 1
+    response = served[0].test_client().post("/api/stream", json={"message": QUERY, "session_id": "smoke"})
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "event: complete" in body
+    assert "event: error" not in body
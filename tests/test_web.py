@@ -0,0 +1,15 @@
+"""Unit tests for the web chat helpers."""
+
+import pytest
+
+from libs.commands.web.web import _is_followup
+
+
+@pytest.mark.parametrize("message", ["go on", "  Continue. ", "Tell me more!", "why?", "explain further"])
+def test_is_followup_matches_continuations(message):
+    assert _is_followup(message)
+
+
+@pytest.mark.parametrize("message", ["", "why is the sky blue", "more about Redis sessions", "continue " * 5])
+def test_is_followup_rejects_new_questions(message):
+    assert not _is_followup(message)